@@ -0,0 +1,27 @@
+import os
+import pygame
+
+from constants import *
+from classes.sound.audio_bank import AudioBank
+from classes.sound.sound_manager import Sound
+from utils.system_utils import getAssetPath, getSoundFiles, loadManifest
+
+# packs the sound effects listed in the asset manifest into a bank of pre-decoded samples
+# run it again after changing the sounds (the game falls back to the .wav files when the bank is missing or was built for another mixer format)
+#   python src/build_audio_bank.py
+
+Sound.pre_init() # the bank has to match the format the game's mixer uses
+pygame.mixer.init()
+mixer_format = pygame.mixer.get_init()
+
+categories = {}
+for folder in loadManifest().get("sfx", {}):
+    categories[folder] = [(name, pygame.mixer.Sound(getAssetPath("SFX", folder, name))) for name in getSoundFiles(folder)]
+
+path = getAssetPath(AUDIO_BANK)
+AudioBank.write(path, mixer_format, categories)
+
+count = sum(len(sounds) for sounds in categories.values())
+print(f"Packed {count} sounds ({mixer_format[0]} Hz, {abs(mixer_format[1])} bit, {mixer_format[2]} channels) into {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+pygame.mixer.quit()
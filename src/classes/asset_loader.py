@@ -0,0 +1,135 @@
+import io
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import *
+from utils.system_utils import getAssetPath, getSoundFiles, loadManifest
+
+class AssetLoader:
+    def __init__(self, maxWorkers=ASSET_LOADER_WORKERS):
+        """
+        decodes the game's sounds, images and fonts on a thread pool, and keeps every asset so it's only loaded once
+
+        maxWorkers: number of assets decoded at the same time
+        """
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers)
+        self.jobs = {} # decoding jobs, by (kind, path, size)
+        self.assets = {} # finished assets, by (kind, path, size) (scaled images have their size in pixels)
+
+    def decode(self, kind, path, size):
+        """
+        loads an asset from its file (runs on a worker thread)
+
+        kind: "file" (the file's bytes), "sound", "image" or "font"
+        path: path of the asset's file
+        size: point size of a font (None for other assets)
+        """
+        if kind == "file":
+            with open(path, "rb") as file:
+                return file.read()
+        if kind == "sound":
+            return pygame.mixer.Sound(path)
+        if kind == "image":
+            return pygame.image.load(path)
+
+        # every size of a font is opened from the same bytes, so the file is only read once
+        # (the file's job was queued first, so it's already running or done)
+        data = self.jobs[("file", path, None)].result()
+        return pygame.font.Font(io.BytesIO(data), size)
+
+    def request(self, kind, path, size=None):
+        """
+        queues an asset for decoding (an asset that was already requested isn't decoded twice)
+
+        kind: "file", "sound", "image" or "font"
+        path: path of the asset's file
+        size: point size of a font
+        returns the key of the asset
+        """
+        key = (kind, path, size)
+        if key not in self.jobs:
+            if kind == "font":
+                self.request("file", path)
+            self.jobs[key] = self.executor.submit(self.decode, kind, path, size)
+        return key
+
+    def requestManifest(self, sounds=True):
+        """
+        queues every asset listed in the asset manifest
+
+        sounds: whether to decode the sound effects (only possible once the mixer is initialized)
+        """
+        manifest = loadManifest()
+
+        if sounds:
+            for folder in manifest.get("sfx", {}):
+                for name in getSoundFiles(folder):
+                    self.request("sound", getAssetPath("SFX", folder, name))
+
+        for folder, names in manifest.get("images", {}).items():
+            for name in names:
+                self.request("image", getAssetPath("images", folder, name))
+
+        for name, sizes in manifest.get("fonts", {}).items():
+            for size in sizes:
+                self.request("font", getAssetPath("Fonts", name), size)
+
+    def get(self, kind, path, size=None):
+        """
+        returns a decoded asset, waiting for it if it isn't ready (None if it couldn't be loaded)
+
+        kind: "sound", "image" or "font"
+        path: path of the asset's file
+        size: point size of a font
+        """
+        key = self.request(kind, path, size)
+
+        if key not in self.assets:
+            try:
+                asset = self.jobs[key].result()
+                if kind == "image":
+                    asset = asset.convert_alpha() # needs the display, so it's done on the main thread
+            except (pygame.error, OSError) as e:
+                print(f"Error loading {path}: {e}")
+                asset = None
+            self.assets[key] = asset
+
+        return self.assets[key]
+
+    def getImage(self, path, scale=1.0):
+        """
+        returns an image scaled by a factor, scaling it only the first time that size is asked for
+
+        path: path of the image's file
+        scale: scale factor of the image
+        """
+        image = self.get("image", path)
+        if image is None or scale == 1.0:
+            return image
+
+        size = (int(image.get_width() * scale), int(image.get_height() * scale))
+        key = ("image", path, size)
+        if key not in self.assets:
+            self.assets[key] = pygame.transform.scale(image, size).convert_alpha()
+        return self.assets[key]
+
+    def getSounds(self, folder):
+        """
+        returns the decoded sounds of a category, in order
+
+        folder: name of the category's folder in assets/SFX
+        """
+        sounds = [self.get("sound", getAssetPath("SFX", folder, name)) for name in getSoundFiles(folder)]
+        return [sound for sound in sounds if sound is not None]
+
+    def getProgress(self):
+        """returns the fraction of the requested assets that finished decoding (0 to 1)"""
+        if not self.jobs:
+            return 1.0
+        return sum(job.done() for job in self.jobs.values()) / len(self.jobs)
+
+    def isDone(self):
+        return all(job.done() for job in self.jobs.values())
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
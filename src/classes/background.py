@@ -1,17 +1,34 @@
 import pygame
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from constants import *
-from utils.utils import lightenColor, desaturateColor
+from utils.utils import lightenColors, desaturateColors
 
-from classes.gradient import Gradient
+from classes.gradient import Gradient, GradientSequence
 
 class Background:
+    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="background") # prepares the transitions of every background
+
     def __init__(self):
         """initializes the background with a starting color and gradient transition settings"""
-        self.gradients = []
+        self.gradients = GradientSequence()
 
         self.transition_progress = 1
         self.transition_duration = 2 #seconds
+        self.previous_progress = 1 # transition progress at the previous simulation step
+        self.render_progress = 1 # transition progress interpolated between the last two simulation steps
+
+        self.surfaceCache = OrderedDict() # static background surfaces by color pair, least recently used first
+
+        # row colors of both ends of the running transition
+        self.startingRows = None
+        self.targetRows = None
+
+        self.transitionJob = None # worker job preparing the running transition
+
+        self.lastDrawnColors = None # colors of the last drawn frame, to know when the background changes
 
     def setup(self, numPlats, distance):
         startColor = Gradient.getCurrentColor(numPlats, self.gradients)
@@ -30,9 +47,44 @@ class Background:
 
         self.targetColors = (startinColor, endingColor)
         self.transition_progress = 0
+        self.previous_progress = 0
+
+        # the transition is prepared on the worker thread and picked up on its first frame
+        self.startingRows = None
+        self.targetRows = None
+        self.transitionJob = Background.worker.submit(self.prepareTransition, self.startingColors, self.targetColors)
+
+    def prepareTransition(self, startingColors, targetColors):
+        """
+        computes the rows of both ends of a transition and the target's surface (runs on the worker thread)
+
+        startingColors: colors the transition starts from
+        targetColors: colors the transition ends at
+        returns a tuple of (starting rows, target rows, target surface)
+        """
+        startingRows = self.getRowColors(startingColors)
+        targetRows = self.getRowColors(targetColors)
+        return startingRows, targetRows, self.renderRows(targetRows)
+
+    def collectTransition(self):
+        """
+        swaps in the worker's results for the running transition,
+        computing the rows here instead if the worker hasn't finished yet
+        """
+        job, self.transitionJob = self.transitionJob, None
+
+        if job.done():
+            self.startingRows, self.targetRows, targetSurface = job.result()
+            # the target's surface is what gets drawn once the transition ends
+            self.cacheSurface(self.targetColors, targetSurface)
+        else:
+            self.startingRows = self.getRowColors(self.startingColors)
+            self.targetRows = self.getRowColors(self.targetColors)
 
     def update(self, delta_time):
         """updates the transition progress and interpolates the current colors"""
+        self.previous_progress = self.transition_progress
+
         if 0 <= self.transition_progress < 1:
             self.transition_progress += delta_time / self.transition_duration
             self.transition_progress = min(self.transition_progress, 1)
@@ -51,25 +103,97 @@ class Background:
         else:
             self.currentColors = self.targetColors
 
-    def draw(self, screen, delta_time):
+    def interpolate(self, alpha):
+        """
+        sets the transition progress the background is drawn with between the last two simulation steps
+
+        alpha: how far the frame is between the previous step (0) and the current one (1)
+        """
+        self.render_progress = self.previous_progress + (self.transition_progress - self.previous_progress) * alpha
+
+    @staticmethod
+    def getRowColors(colors):
+        """
+        computes the color of every row of the background
+
+        colors: tuple of the (r, g, b) colors at the bottom and at the top of the window
+        returns a float array of (r, g, b) values shaped (WINDOW_HEIGHT, 3), from the top row to the bottom one
+        """
+        startingColor = np.array(colors[0], dtype=float)
+        targetColor = np.array(colors[1], dtype=float)
+
+        # same steps as Gradient.getGradientColorFrom with one step per row (the bottom row is the first step)
+        steps = np.arange(WINDOW_HEIGHT, 0, -1)[:, np.newaxis]
+        rows = np.clip(np.trunc(startingColor + (targetColor - startingColor) / WINDOW_HEIGHT * steps), 0, 255)
+
+        return desaturateColors(lightenColors(rows, BACKGROUNDLIGHTENING), BACKGROUNDDESATURATION)
+
+    @staticmethod
+    def renderRows(rows):
+        """
+        renders the row colors to a window sized surface (safe to call from the worker thread)
+
+        rows: array of (r, g, b) values shaped (WINDOW_HEIGHT, 3)
+        returns the rendered surface
+        """
+        column = pygame.surfarray.make_surface(rows.astype(np.uint8)[np.newaxis])
+        return pygame.transform.scale(column, (WINDOW_WIDTH, WINDOW_HEIGHT))
+
+    @staticmethod
+    def getCacheKey(colors):
+        return (tuple(colors[0]), tuple(colors[1]))
+
+    def cacheSurface(self, colors, surface):
+        """
+        adds a static background surface to the cache, evicting the least recently used one if it's full
+
+        colors: tuple of the (r, g, b) colors at the bottom and at the top of the window
+        surface: the rendered background
+        """
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert() # match the display's pixel format for faster blits
+
+        self.surfaceCache[self.getCacheKey(colors)] = surface
+        if len(self.surfaceCache) > BACKGROUND_CACHE_SIZE:
+            self.surfaceCache.popitem(last=False)
+
+        return surface
+
+    def getSurface(self, colors):
+        """
+        gets the static background surface for the given colors, rendering it if it isn't cached
+
+        colors: tuple of the (r, g, b) colors at the bottom and at the top of the window
+        """
+        key = self.getCacheKey(colors)
+
+        surface = self.surfaceCache.get(key)
+        if surface is not None:
+            self.surfaceCache.move_to_end(key)
+            return surface
+
+        return self.cacheSurface(colors, self.renderRows(self.getRowColors(colors)))
+
+    def getDirtyRects(self):
+        """returns the parts of the window the background changes this frame"""
+        if self.gradients and (self.currentColors, self.render_progress) != self.lastDrawnColors:
+            return [pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)]
+        return []
+
+    def draw(self, screen):
         """draws the gradient background with smooth transitions"""
-        
-        self.update(delta_time)
+
+        self.lastDrawnColors = (self.currentColors, self.render_progress)
 
         if not self.gradients:
             return
 
-        for i in range(0, WINDOW_HEIGHT, BACKGROUND_ROW_GROUP_SIZE):
-
-            color = desaturateColor(
-                lightenColor( 
-                    Gradient.getGradientColorFrom(
-                        self.currentColors[0],
-                        self.currentColors[1],
-                        WINDOW_HEIGHT,
-                        WINDOW_HEIGHT - i -1
-                    ),
-                             BACKGROUNDLIGHTENING), 
-                BACKGROUNDDESATURATION
-            )
-            pygame.draw.rect(screen, color, (0, i, WINDOW_WIDTH, BACKGROUND_ROW_GROUP_SIZE))
\ No newline at end of file
+        if self.transitionJob is not None:
+            self.collectTransition()
+
+        if self.render_progress < 1 and self.startingRows is not None:
+            # blend the rows of both ends of the transition
+            rows = self.startingRows + (self.targetRows - self.startingRows) * self.render_progress
+            screen.blit(self.renderRows(rows), (0, 0))
+        else:
+            screen.blit(self.getSurface(self.currentColors), (0, 0))
@@ -8,10 +8,13 @@ from constants import *
 from classes.state_manager import StateManager, GameState
 from classes.ui.ui_manager import UI
 from classes.sound.sound_manager import Sound
+from classes.asset_loader import AssetLoader
 from classes.background import Background
-from classes.gradient import Gradient
+from classes.gradient import Gradient, GradientSequence
 from classes.platform import Platform
 from classes.tower import Tower
+from classes.simulation_clock import SimulationClock
+from utils.system_utils import getCurrentMonitorFramerate, getTimestampedEvents
 
 def ease_in_out(t):
     """smooth easing function for animations"""
@@ -22,6 +25,7 @@ class Game:
         self.windowRes = (WINDOW_WIDTH, WINDOW_HEIGHT)
         self.screen = pygame.display.set_mode(self.windowRes)
         pygame.display.set_caption("Stack!")
+        self.framerate = getCurrentMonitorFramerate() # refresh rate of the monitor the window is on
         
         # game variables
         self.numPlats = NSPLATS
@@ -34,30 +38,25 @@ class Game:
 
         self.perfectAlignmentMode = False
         self.running = True
+        self.pendingEvent = None # event that woke up waitForEvents, handled before the rest of the queue
 
-        self.clock = pygame.time.Clock()
-        self.previous_mouse_state = (0, 0, 0)
+        self.dirtyRects = [] # parts of the window that changed in the last frame (only used in dirty rect mode)
 
-        self.sound_manager = Sound()
-        self.state_manager = StateManager(self)
-        
         self.clock = pygame.time.Clock()
-        self.previous_mouse_state = (0, 0, 0)
+        self.simulationClock = SimulationClock() # the game is simulated in fixed steps, independently from the frame rate
 
-        self.sound_manager = Sound()
-        self.state_manager = StateManager(self)
-        
-        self.clock = pygame.time.Clock()
-        self.previous_mouse_state = (0, 0, 0)
+        # the assets are decoded in the background while the loading screen is shown
+        self.assetLoader = AssetLoader()
+        self.sound_manager = Sound(self.assetLoader)
+        self.assetLoader.requestManifest(sounds=self.sound_manager.needs_decoding())
 
-        self.sound_manager = Sound()
         self.state_manager = StateManager(self)
         
         # Set initial state to LOADING
         self.state_manager.changeState(GameState.LOADING)
         
-        # load UI after setup
-        self.ui = UI(self)
+        # the UI is created once its fonts and icons are loaded
+        self.ui = None
     
     def setup(self):
         self.numPlats = NSPLATS
@@ -65,9 +64,7 @@ class Game:
 
         self.nextPlatWidth = SBASEWIDTH
         self.nextPlatDepth = SBASEDEPTH
-        self.initialColor = (random.randint(MINCVALUE, MAXCVALUE), 
-                            random.randint(MINCVALUE, MAXCVALUE), 
-                            random.randint(MINCVALUE, MAXCVALUE))
+        self.initialColor = Gradient.sampler.randomColor()
 
         self.background = Background()
         self.background.gradients.append(Gradient(self.initialColor, self.background.gradients, self.numPlats))
@@ -76,7 +73,7 @@ class Game:
         self.platVelocity = STARTVEL
 
         self.plat = Platform(SBASEWIDTH, SBASEDEPTH, PHEIGHT, self.platVelocity, self.numPlats, True)
-        self.plat.setup(Gradient.getCurrentColor(self.numPlats, self.background.gradients))
+        self.plat.setup(Gradient.getCurrentFaceColors(self.numPlats, self.background.gradients))
         self.tower = Tower(NSPLATS, self.initialColor)
 
         self.clock = pygame.time.Clock()
@@ -86,6 +83,26 @@ class Game:
         self.perfectStackCounter = 0
         self.distance = random.randint(MIN_DISTANCE, MAX_DISTANCE)
 
+    def finishLoading(self):
+        """create what needed the loaded assets and start the game"""
+        if self.sound_manager.sound_available:
+            self.sound_manager.load_all_sounds()
+        self.ui = UI(self)
+        self.setup()
+
+    def drawLoadingScreen(self):
+        """draw the loading progress bar"""
+        self.screen.fill(LOADING_BACKGROUND_COLOR)
+
+        track = pygame.Rect((0, 0), LOADING_BAR_SIZE)
+        track.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+        pygame.draw.rect(self.screen, LOADING_TRACK_COLOR, track, border_radius=track.height // 2)
+
+        bar = track.copy()
+        bar.width = round(track.width * self.assetLoader.getProgress())
+        if bar.width > 0:
+            pygame.draw.rect(self.screen, LOADING_BAR_COLOR, bar, border_radius=track.height // 2)
+
     def restartGame(self):
         """reset the game"""
         
@@ -97,19 +114,17 @@ class Game:
         self.nextPlatWidth = SBASEWIDTH
         self.nextPlatDepth = SBASEDEPTH
         
-        self.initialColor = (random.randint(MINCVALUE, MAXCVALUE), 
-                             random.randint(MINCVALUE, MAXCVALUE), 
-                             random.randint(MINCVALUE, MAXCVALUE))
+        self.initialColor = Gradient.sampler.randomColor()
 
         self.background = Background()
-        self.background.gradients = []
+        self.background.gradients = GradientSequence()
         self.background.gradients.append(Gradient(self.initialColor, self.background.gradients, self.numPlats))
         self.background.setup(self.numPlats, self.distance)
 
         self.tower = Tower(NSPLATS, self.initialColor)
 
         self.plat = Platform(SBASEWIDTH, SBASEDEPTH, PHEIGHT, self.platVelocity, self.numPlats, True)
-        self.plat.setup(Gradient.getCurrentColor(self.numPlats, self.background.gradients))
+        self.plat.setup(Gradient.getCurrentFaceColors(self.numPlats, self.background.gradients))
         self.plat.align(self.tower.getLastPlat())
         
         self.state_manager.changePreviousState(GameState.MENU)
@@ -139,18 +154,59 @@ class Game:
             elif self.state_manager.previous_state == GameState.MENU:
                 self.state_manager.changeState(GameState.MENU)
 
+    def isAnimating(self):
+        """check if anything on screen is animating on its own"""
+        if self.ui.darkening_animating or self.ui.score_animating or self.ui.volumeSlider.dragging or \
+           self.background.transition_progress < 1 or self.background.transitionJob is not None:
+            return True
+
+        # the tower and the platforms are frozen outside of PLAYING
+        return self.state_manager.isState(GameState.PLAYING) and \
+               (self.tower.t != -1 or self.tower.geometry.getExpandingIndices(self.tower.firstVisible).size > 0)
+
+    def isIdle(self):
+        """check if the game can wait for input instead of drawing frames"""
+        return self.state_manager.isIdleState() and not self.isAnimating()
+
+    def waitForEvents(self, timeout):
+        """
+        block until there's input or the timeout runs out
+
+        timeout: maximum time to wait in milliseconds
+        """
+        event = pygame.event.wait(timeout)
+        if event.type != pygame.NOEVENT:
+            self.pendingEvent = event # keep it for handleEvents (posting it back would put it behind newer events)
+
+    def waitForNextFrame(self):
+        """
+        wait until the next frame is due while reading the input, so SDL timestamps the events when they happen
+        instead of when the frame starts (the clock's tick sleeps for what's left)
+        """
+        due = self.simulationClock.ticks + 1000 / self.framerate
+        while pygame.time.get_ticks() < due - 1:
+            pygame.event.pump()
+            pygame.time.wait(1)
+
     def handleEvents(self):
         # check if Caps Lock is on
         caps_lock_state = pygame.key.get_mods() & pygame.KMOD_CAPS
         self.perfectAlignmentMode = caps_lock_state > 0
 
-        for event in pygame.event.get():
+        events = getTimestampedEvents()
+        if self.pendingEvent is not None:
+            events.insert(0, self.pendingEvent)
+            self.pendingEvent = None
+
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.WINDOWDISPLAYCHANGED: # the window moved to another monitor
+                self.framerate = getCurrentMonitorFramerate()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE: # space key
                     if self.state_manager.isState(GameState.PLAYING): # if the game is playing, place the platform
-                        self.handlePlatformPlacement()
+                        self.handlePlatformPlacement(getattr(event, "timestamp", None))
                     elif self.state_manager.isState(GameState.MENU): # if the game is in the menu, start playing
                         self.state_manager.changeState(GameState.PLAYING)
                     elif self.state_manager.isState(GameState.GAMEOVER): # if the game is over, restart the game
@@ -159,28 +215,36 @@ class Game:
                 elif event.key == pygame.K_ESCAPE: # escape key
                     if self.state_manager.isState(GameState.SETTINGS): # if the game is in the settings, go back to the pause menu
                         self.toggleSettings()
-                        self.sound_manager.button_click_sfx[0].play()
+                        self.sound_manager.play_button_click()
                     elif self.state_manager.isState(GameState.PLAYING): # if the game is playing, pause the game
                         self.togglePause()
                     elif self.state_manager.isState(GameState.PAUSED): # if the game is paused, resume the game
                         self.togglePause()
 
-                elif event.key == pygame.K_r: # r key
+                elif event.key == pygame.K_r and not self.state_manager.isState(GameState.LOADING): # r key (the game doesn't exist until loading is done)
                         self.restartGame()
 
-        current_mouse_state = pygame.mouse.get_pressed()
+            elif event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP) and self.ui is not None:
+                # the widgets get the event first, a click they don't use goes to the game
+                if self.ui.handleEvent(event) or event.type != pygame.MOUSEBUTTONDOWN or event.button != 1:
+                    continue
+                if self.state_manager.isState(GameState.PLAYING): # place the platform
+                    self.handlePlatformPlacement(getattr(event, "timestamp", None))
+                elif self.state_manager.isState(GameState.MENU): # start playing
+                    self.state_manager.changeState(GameState.PLAYING)
+                elif self.state_manager.isState(GameState.GAMEOVER): # if the game is over, restart the game
+                    self.setup()
+
+    def handlePlatformPlacement(self, ticks=None):
+        """
+        place the moving platform on the tower
+
+        ticks: moment of the input in pygame ticks (defaults to the start of the last frame)
+        """
+        # judge the platform where the player saw it at the moment of the input (frames are drawn a step behind the simulation)
+        input_time = self.simulationClock.getTimeAt(self.simulationClock.ticks if ticks is None else ticks)
+        self.plat.moveTo(self.plat.moveTime + input_time - self.simulationClock.step)
 
-        if current_mouse_state[0] and not self.previous_mouse_state[0]:
-            if self.state_manager.isState(GameState.PLAYING) and not self.ui.isAnyUnwantedButtonHovered():
-                self.handlePlatformPlacement()
-            elif self.state_manager.isState(GameState.MENU) and not self.ui.isAnyUnwantedButtonHovered():
-                self.state_manager.changeState(GameState.PLAYING)
-            elif self.state_manager.isState(GameState.GAMEOVER): # if the game is over, restart the game
-                self.setup()
-
-        self.previous_mouse_state = current_mouse_state
-
-    def handlePlatformPlacement(self):
         lastPlat = self.tower.getLastPlat()
         nextPlatWidth, nextPlatDepth, perfectPlacement = self.tower.getTrimming(self.plat, lastPlat)
         nextPlatWidth, nextPlatDepth = round(nextPlatWidth, DECIMALPLACES), round(nextPlatDepth, DECIMALPLACES)
@@ -218,21 +282,20 @@ class Game:
                     self.plat.depth = nextPlatDepth
 
                     # align the platform with the last platform
-                    self.plat.vertices[:, 0] = np.clip(self.plat.vertices[:, 0], min(lastPlat.vertices[:, 0]), max(lastPlat.vertices[:, 0]))
-                    self.plat.vertices[:, 1] = np.clip(self.plat.vertices[:, 1], min(lastPlat.vertices[:, 1]), max(lastPlat.vertices[:, 1]))
+                    self.plat.clipTo(lastPlat)
 
             self.tower.add(self.plat)
             self.numPlats = self.tower.getNumPlats()
             lastPlat = self.tower.getLastPlat()
 
-            currentGradient = Gradient.getCurrentGradient(self.background.gradients, self.numPlats) 
-            if currentGradient is None or self.numPlats > currentGradient.toIndex: # if the current gradient is not valid, then generate new gradients
-                Gradient.newGradients(self.background.gradients, self.numPlats)
+            # new gradients are generated when they're first needed, the ones far below the tower's top are dropped
+            self.background.gradients.evictBelow(self.numPlats)
 
             self.plat = Platform(nextPlatWidth, nextPlatDepth, PHEIGHT, self.platVelocity, self.numPlats, True)
-            self.plat.setup(Gradient.getCurrentColor(self.numPlats, self.background.gradients))
+            self.plat.setup(Gradient.getCurrentFaceColors(self.numPlats, self.background.gradients))
 
             self.plat.align(lastPlat)
+            self.plat.moveTime = -input_time # the new platform starts moving at the moment of the input
 
             # check if the background should transition to a new gradient
             if random.random() < BACKGROUND_ANIMATION_CHANCE and self.background.transition_progress >= 1:
@@ -248,25 +311,74 @@ class Game:
         print(f"Game Over!\nRestarting...")
         self.setup()
 
+    def updateSimulation(self, step):
+        """
+        advance the simulation by one fixed step
+
+        step: duration of the step in seconds
+        """
+        self.background.update(step)
+
+        if self.state_manager.isState(GameState.PLAYING):
+            self.tower.update(step)
+            self.plat.update(step)
+
+    def isPlatVisible(self):
+        """check if the moving platform is drawn in the current state"""
+        return not self.state_manager.isState(GameState.GAMEOVER) and \
+               not self.state_manager.isState(GameState.MENU)
+
+    def getDirtyRects(self):
+        """collect the parts of the window each subsystem changes this frame"""
+        rects = self.background.getDirtyRects() + self.tower.getDirtyRects()
+
+        if self.isPlatVisible():
+            rects += self.plat.getDirtyRects(self.tower.renderCameraZ)
+        elif self.plat.lastDrawnRect is not None: # the platform disappeared
+            rects.append(self.plat.lastDrawnRect)
+            self.plat.lastDrawnRect = None
+
+        return rects + self.ui.collectDirtyRects(self.score)
+
     def drawGame(self, delta_time):
         """draw game elements based on current state"""
         
         # loading screen
         if self.state_manager.isState(GameState.LOADING):
-            self.setup()
+            if self.assetLoader.isDone():
+                self.finishLoading()
+                self.simulationClock.reset()
+            else:
+                self.drawLoadingScreen()
+            self.dirtyRects = [self.screen.get_rect()]
         else:
-            self.background.draw(self.screen, delta_time)
+            for _ in range(self.simulationClock.advance(delta_time)):
+                self.updateSimulation(self.simulationClock.step)
+
+            # draw in between the last two simulation steps
+            alpha = self.simulationClock.getAlpha()
+            self.background.interpolate(alpha)
 
-            if self.state_manager.isState(GameState.PLAYING):
-                self.tower.update(FRAMERATE, delta_time)
-                self.plat.update(delta_time)
+            if not self.state_manager.isState(GameState.PLAYING):
+                alpha = 1 # the tower and the platform are frozen on their last step
+            self.tower.interpolate(alpha)
+            self.plat.interpolate(alpha)
+
+            if DIRTY_RECTS:
+                # only repaint the parts of the window that changed (the UI still runs when nothing did)
+                self.dirtyRects = self.getDirtyRects()
+                clip = self.dirtyRects[0].unionall(self.dirtyRects[1:]) if self.dirtyRects else pygame.Rect(0, 0, 0, 0)
+                self.screen.set_clip(clip)
+
+            self.background.draw(self.screen)
             
             self.tower.draw(self.screen)
 
-            if not self.state_manager.isState(GameState.GAMEOVER) and \
-               not self.state_manager.isState(GameState.MENU):
-                self.plat.draw(self.screen)
+            if self.isPlatVisible():
+                self.plat.draw(self.screen, self.tower.renderCameraZ)
 
             # pass state info to ui
             is_paused = self.state_manager.isState(GameState.PAUSED) or self.state_manager.isState(GameState.SETTINGS)
-            self.ui.drawUi(self.screen, self.score, is_paused)
\ No newline at end of file
+            self.ui.drawUi(self.screen, self.score, is_paused)
+
+            self.screen.set_clip(None)
\ No newline at end of file
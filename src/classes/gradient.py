@@ -1,36 +1,96 @@
-import random
+import numpy as np
+from bisect import bisect_right
 
 from constants import *
+from utils.utils import lightenColors
+
+class ColorSampler:
+    def __init__(self, seed=None):
+        """
+        draws random gradient colors in batches from a numpy generator
+
+        seed: seed of the generator (None for a random one), the same seed always produces the same gradients
+        """
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """restarts the generator from the given seed and empties the pool"""
+        self.rng = np.random.default_rng(seed)
+        self.pool = np.empty((0, 3), dtype=int) # candidate colors that haven't been used yet
+
+    def refill(self):
+        """refills the pool with a new batch of candidate colors"""
+        self.pool = self.rng.integers(MINCVALUE, MAXCVALUE, size=(COLORPOOLSIZE, 3), endpoint=True)
+
+    def randomColor(self):
+        """takes the next candidate color from the pool without any checks"""
+        if not len(self.pool):
+            self.refill()
+
+        color, self.pool = self.pool[0], self.pool[1:]
+        return tuple(color.tolist())
+
+    def randomInt(self, low, high):
+        """returns a random integer between low and high (both included)"""
+        return int(self.rng.integers(low, high, endpoint=True))
+
+    def sample(self, startingColor, previousColor=None):
+        """
+        takes the next candidate color that's far enough from the starting color and from the previous gradient's color
+
+        startingColor: (r, g, b) color the gradient starts from
+        previousColor: (r, g, b) starting color of the previous gradient (None if there isn't one)
+        returns a tuple of (r, g, b) values
+        """
+        for _ in range(MAXCOLORREFILLS): # bounded, the pool is refilled a few times at most
+            if not len(self.pool):
+                self.refill()
+
+            # check every candidate at once
+            valid = np.linalg.norm(self.pool - startingColor, axis=1) > COLORTHRESHOLD
+            if previousColor is not None:
+                valid &= np.linalg.norm(self.pool - previousColor, axis=1) > COLORTHRESHOLD
+
+            accepted = np.flatnonzero(valid)
+            if accepted.size:
+                i = accepted[0]
+                color, self.pool = self.pool[i], self.pool[i + 1:] # the rejected candidates are dropped
+                return tuple(color.tolist())
+
+            self.pool = self.pool[:0]
+
+        return self.randomColor() # random fallback color
 
 class Gradient:
+    sampler = ColorSampler(GRADIENT_SEED) # shared by every gradient so they all come from the same sequence
+
     def __init__(self, startingColor, gradients, fromIndex):
         self.startingColor = startingColor
         self.targetColor = self.generateTargetColor(gradients)
-        self.numSteps = random.randint(MINNSTEPS, MAXNSTEPS)
+        self.numSteps = Gradient.sampler.randomInt(MINNSTEPS, MAXNSTEPS)
         self.fromIndex = fromIndex
         self.toIndex = fromIndex + self.numSteps
+        self.colorTable = self.getColorTable()
+
+    def getColorTable(self):
+        """
+        computes the face colors of every platform index the gradient covers
+
+        returns a uint8 array shaped (numSteps + 1, 3, 3) with the top (light), left (dark) and right (base) face colors
+        of each index, matching Platform.getColors
+        """
+        startingColor = np.array(self.startingColor, dtype=float)
+        targetColor = np.array(self.targetColor, dtype=float)
+
+        # same steps as getGradientColor for every index at once
+        steps = np.arange(1, self.numSteps + 2)[:, np.newaxis]
+        base = np.clip(np.trunc(startingColor + (targetColor - startingColor) / self.numSteps * steps), 0, 255)
+
+        return np.stack((lightenColors(base, 1.4), lightenColors(base, .6), base), axis=1).astype(np.uint8)
 
     def generateTargetColor(self, gradients):
-        attempts = 0
-        max_attempts = 1000  # prevent an infinite loop
-        while attempts < max_attempts:
-            targetColor = (
-                random.randint(MINCVALUE, MAXCVALUE),
-                random.randint(MINCVALUE, MAXCVALUE),
-                random.randint(MINCVALUE, MAXCVALUE)
-            )
-            if self.colorDistance(self.startingColor, targetColor) > COLORTHRESHOLD:
-                if gradients:
-                    last_startingColor = gradients[-1].startingColor
-                    if self.colorDistance(last_startingColor, self.startingColor) > COLORTHRESHOLD:
-                        return targetColor
-                else:
-                    return targetColor
-            attempts += 1
-        
-        return (random.randint(MINCVALUE, MAXCVALUE),
-                random.randint(MINCVALUE, MAXCVALUE),
-                random.randint(MINCVALUE, MAXCVALUE))  # random fallback color
+        previousColor = gradients[-1].startingColor if gradients else None
+        return Gradient.sampler.sample(self.startingColor, previousColor)
     
     @staticmethod
     def colorDistance(color1, color2):
@@ -41,6 +101,9 @@ class Gradient:
     
     @staticmethod
     def getGradientColor(gradient, index):
+        if 0 <= index <= gradient.numSteps:
+            return tuple(gradient.colorTable[index, 2].tolist()) # base color from the table
+
         sr, sg, sb = gradient.startingColor
         tr, tg, tb = gradient.targetColor
 
@@ -77,7 +140,7 @@ class Gradient:
         fromIndex = gradients[-1].toIndex + 1 if gradients else numPlats
 
         # get the starting color for the new gradients from the last gradient
-        startingColor = Gradient.getCurrentGradient(gradients, fromIndex - 1).targetColor
+        startingColor = gradients[-1].targetColor
 
         for _ in range(0, NEWGRADIENTCOUNT):
             gradient = Gradient(startingColor, gradients, fromIndex)
@@ -92,14 +155,16 @@ class Gradient:
         """
         gets the current gradient for a given color
         """
-        # find the appropriate gradient for the current platform count
-        for gradient in reversed(gradients):
-            if gradient.fromIndex <= numPlats <= gradient.toIndex:
-                return gradient
-        
-        # there should always be a gradient that matches the current platform count
-        return gradients[-1] if gradients else None
+        return gradients.find(numPlats)
     
+    @staticmethod
+    def getCurrentFaceColors(numPlats, gradients):
+        """
+        gets the top, left and right face colors of the platform at the given index from the color tables
+        """
+        gradient = Gradient.getCurrentGradient(gradients, numPlats)
+        return gradient.colorTable[numPlats - gradient.fromIndex]
+
     @staticmethod
     def getCurrentColor(numPlats, gradients):
         gradient = Gradient.getCurrentGradient(gradients, numPlats)
@@ -136,4 +201,86 @@ class Gradient:
             gradient = Gradient.getCurrentGradient(gradients, numPlats)
             index -= gradient.numSteps + 1
 
-        return gradient, index
\ No newline at end of file
+        return gradient, index
+
+class GradientSequence:
+    def __init__(self):
+        """
+        the background's gradients, sorted by the platform index they start at
+        (future gradients are generated on demand and old ones are evicted)
+        """
+        self.gradients = []
+        self.fromIndices = [] # fromIndex of each gradient, for the binary search
+
+    def append(self, gradient):
+        self.gradients.append(gradient)
+        self.fromIndices.append(gradient.fromIndex)
+
+    def __len__(self):
+        return len(self.gradients)
+
+    def __iter__(self):
+        return iter(self.gradients)
+
+    def __getitem__(self, index):
+        return self.gradients[index]
+
+    def ensure(self, numPlats):
+        """
+        generates new gradients until one covers the given platform index
+
+        numPlats: the platform index that has to be covered
+        """
+        while self.gradients and self.gradients[-1].toIndex < numPlats:
+            Gradient.newGradients(self, numPlats)
+
+    def find(self, numPlats):
+        """
+        finds the gradient that covers the given platform index, generating it if it doesn't exist yet
+
+        numPlats: the platform index
+        returns the gradient (None if there are no gradients)
+        """
+        if not self.gradients:
+            return None
+
+        self.ensure(numPlats)
+
+        i = bisect_right(self.fromIndices, numPlats) - 1
+        return self.gradients[max(i, 0)] # indices below the oldest kept gradient fall back to it
+
+    def getColorTable(self, start, end):
+        """
+        gets the face colors of a range of platform indices, for drawing many platforms at once
+
+        start: first platform index
+        end: platform index to stop at
+        returns a uint8 array shaped (end - start, 3, 3), see Gradient.getColorTable
+        """
+        self.ensure(end - 1)
+
+        tables = []
+        numPlats = start
+        while numPlats < end:
+            gradient = self.find(numPlats)
+            stop = min(end, gradient.toIndex + 1)
+            tables.append(gradient.colorTable[numPlats - gradient.fromIndex:stop - gradient.fromIndex])
+            numPlats = stop
+
+        return np.concatenate(tables) if tables else np.empty((0, 3, 3), dtype=np.uint8)
+
+    def evictBelow(self, numPlats):
+        """
+        drops the gradients that ended more than GRADIENTHISTORY platforms below the given index
+
+        numPlats: index of the current platform
+        """
+        count = bisect_right(self.fromIndices, numPlats - GRADIENTHISTORY)
+        while count > 0 and self.gradients[count - 1].toIndex >= numPlats - GRADIENTHISTORY:
+            count -= 1
+
+        # always keep the last gradient, the next ones start from its target color
+        count = min(count, len(self.gradients) - 1)
+        if count > 0:
+            del self.gradients[:count]
+            del self.fromIndices[:count]
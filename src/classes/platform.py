@@ -4,27 +4,98 @@ import numpy as np
 from constants import *
 from utils.utils import lightenColor, ease_in_out
 
+from classes.tower_geometry import StoreField, getCorners
+from classes.projection import LEANING_FACTOR, projectVertices, getScreenOffset
+
+EDGES = (
+    (0,1),
+    (0,2),
+    (0,4),
+    (1,3),
+    (1,5),
+    (2,3),
+    (2,6),
+    (3,7),
+    (4,5),
+    (4,6),
+    (5,7),
+    (6,7)
+)
+
+VISIBLE_EDGES = (
+    (1,3),
+    (1,5),
+    (2,3),
+    (2,6),
+    (3,7),
+    (4,5),
+    (4,6),
+    (5,7),
+    (6,7)
+)
+
+FACES = (
+    (0,1,3,2), # not visible left face
+    (0,1,5,4), # not visible right face
+    (0,2,6,4), # bottom face
+    (1,3,7,5), # top face
+    (2,3,7,6), # visible left face
+    (4,5,7,6)  # visible right face
+)
+
+VISIBLE_FACES = (
+    (1,3,7,5), # top face
+    (2,3,7,6), # left face
+    (4,5,7,6)  # right face
+)
+
 class Platform:
+    # the tower keeps one platform object per row, so they don't carry a __dict__
+    __slots__ = (
+        "store", "index", "moving", "direction", "velocity", "moveTime", "origin",
+        "width", "depth", "height", "z_offset", "targetDepth",
+        "expand_duration", "expand_timer", "expand_progress", "expandDirection",
+        "lastDrawnRect", "previous_box", "render_box", "edges", "faces",
+        "_box", "_initial_box", "_final_box", "_colors", "_expanding" # StoreField values while the platform isn't in the tower
+    )
+
+    # once the platform is added to the tower these live in the tower's geometry store
+    box = StoreField() # (x0, x1, y0, y1, z0, z1)
+    initial_box = StoreField()
+    final_box = StoreField()
+    colors = StoreField()
+    expanding = StoreField()
+
     def __init__(self, width, depth, height, platVelocity, numPlats, moving, z_offset = PHEIGHT): #moving can either be true or false (false means the platform is a part of the tower)
+        self.store = None # tower geometry store the platform is a view into (None while it isn't part of the tower)
+        self.index = -1 # row of the platform in the store
+
         self.moving = moving
         self.expanding = False
         self.direction = self.getDirection(numPlats) if moving else -1 # this will be either 0 or 1; 0 (moving right to left) and 1 (moving left to right); -1 means no movement
         self.velocity = platVelocity
+        self.moveTime = 0 # seconds the platform has been moving for
+        self.origin = 0 # position of the box's leading side (x0 or y0) when it started moving
 
         self.width = width
         self.depth = depth
         self.height = height
         self.z_offset = z_offset
-        self.initial_vertices = None
-        self.final_vertices = None
+        self.initial_box = None
+        self.final_box = None
         self.targetDepth = self.depth
 
         self.expand_duration = .5 # seconds
         self.expand_timer = 0 # current time for the expansion animation
         self.expand_progress = 0 # progress from 0 to 1
+        self.expandDirection = 0 # 0 means no expansion, 1 means expanding a visible face, -1 means expanding an non visible face
 
         self.colors = None
-        self.vertices = None
+        self.box = None
+        self.lastDrawnRect = None # part of the window the platform was drawn on last frame
+
+        self.previous_box = None # box at the previous simulation step
+        self.render_box = None # box interpolated between the last two simulation steps (None to draw the current box)
         self.edges = None
         self.faces = None
         
@@ -32,15 +103,47 @@ class Platform:
         """
         sets up the platform with the given color and aligns it with the last platform if provided
         
-        rgb: tuple of (r, g, b) values for the platform color
+        rgb: tuple of (r, g, b) values for the platform color, or the top, left and right face colors from a gradient's color table
         lastPlat: the last platform object to align with
         """
-        self.vertices = self.getVertices(lastPlat)
-        self.initial_vertices = self.vertices.copy()
-        self.final_vertices = self.vertices.copy()
-        self.colors = self.getColors(rbg)
+        self.box = self.getBox(lastPlat)
+        self.initial_box = self.box.copy()
+        self.final_box = self.box.copy()
+        self.colors = rbg if np.ndim(rbg) == 2 else self.getColors(rbg)
         self.edges = self.getEdges()
         self.faces = self.getVisibleFaces()
+        self.resetMotion()
+
+    def attach(self, store):
+        """
+        moves the platform's geometry into the tower geometry store, turning the platform into a view of its row
+
+        store: the tower geometry store
+        """
+        self.index = store.append(self)
+        self.store = store
+
+        # the store owns the arrays from now on
+        self._box = self._initial_box = self._final_box = self._colors = None
+
+        # a platform in the tower never moves again, so its motion and interpolation state can go
+        self.velocity = self.moveTime = self.origin = None
+        self.previous_box = self.render_box = self.lastDrawnRect = None
+
+    @property
+    def vertices(self):
+        """the 8 corners of the platform's current box, only generated when the renderer needs them"""
+        return getCorners(self.box)
+
+    @property
+    def renderVertices(self):
+        """the 8 corners of the box the platform is drawn with"""
+        return getCorners(self.box if self.render_box is None else self.render_box)
+
+    @property
+    def final_vertices(self):
+        """the 8 corners of the platform's final box"""
+        return getCorners(self.final_box)
 
     def getDirection(self, numPlats):
         """
@@ -68,32 +171,24 @@ class Platform:
         """
         return [lightenColor(rgb, 1.4), lightenColor(rgb, .6), rgb]
 
-    def getVertices(self, lastPlat = None):
+    def getBox(self, lastPlat = None):
         """
-        defines the vertices of the platform
+        defines the axis-aligned box of the platform
         
         lastPlat: the last platform object to align with
-        returns an array of vertices for the platform
+        returns an array of (x0, x1, y0, y1, z0, z1) for the platform
         """
-        # defining the base grid
-        x = np.array([0, self.width], dtype=float)
-        y = np.array([0, self.depth], dtype=float)
-        z = np.array([0, self.height], dtype=float)
-
-        # generating the actual grid
-        X, Y, Z = np.meshgrid(x, y, z, indexing="ij")
-
-        vertices = np.column_stack([X.ravel(), Y.ravel(), Z.ravel()]).astype(float)
+        box = np.array([0, self.width, 0, self.depth, 0, self.height], dtype=float)
 
         if(self.direction == 0):
-            vertices[:, 0] -= PLATCENTEROFFSET
+            box[0:2] -= PLATCENTEROFFSET
         elif(self.direction == 1):
-            vertices[:, 1] -= PLATCENTEROFFSET
+            box[2:4] -= PLATCENTEROFFSET
 
         if(not self.moving):
-            vertices[:, 2] -= self.z_offset
+            box[4:6] -= self.z_offset
 
-        return vertices
+        return box
 
     def getEdges(self):
         """
@@ -101,21 +196,7 @@ class Platform:
         
         returns a list of edges for the platform
         """
-        edges = [
-            (0,1),
-            (0,2),
-            (0,4),
-            (1,3),
-            (1,5),
-            (2,3),
-            (2,6),
-            (3,7),
-            (4,5),
-            (4,6),
-            (5,7),
-            (6,7)
-        ]
-        return edges
+        return EDGES
 
     def getVisibleEdges(self):
         """
@@ -123,18 +204,7 @@ class Platform:
         
         returns a list of visible edges for the platform
         """
-        visible_edges = [
-            (1,3),
-            (1,5),
-            (2,3),
-            (2,6),
-            (3,7),
-            (4,5),
-            (4,6),
-            (5,7),
-            (6,7)
-        ]
-        return visible_edges
+        return VISIBLE_EDGES
 
     def getFaces(self):
         """
@@ -142,16 +212,7 @@ class Platform:
         
         returns a list of faces for the platform
         """
-        faces = [
-            (0,1,3,2), # not visible left face
-            (0,1,5,4), # not visible right face
-            (0,2,6,4), # bottom face
-            (1,3,7,5), # top face
-            (2,3,7,6), # visible left face
-            (4,5,7,6)  # visible right face
-        ]
-
-        return faces
+        return FACES
 
     def getVisibleFaces(self):
         """
@@ -159,94 +220,77 @@ class Platform:
         
         returns a list of the visible faces for the platform
         """
-        visible_faces = [
-            (1,3,7,5), # top face
-            (2,3,7,6), # left face
-            (4,5,7,6)  # right face
-        ]
-        return visible_faces
+        return VISIBLE_FACES
 
-    def convertToIsometric(self, x, y ,z):
+    @staticmethod
+    def convertToIsometric(x, y ,z):
         """
         converts 3D coordinates to isometric projection
         
-        x: X coordinate
-        y: Y coordinate
-        z: Z coordinate
-        returns a tuple of isometric (x, y) coordinates
+        x: X coordinate(s)
+        y: Y coordinate(s)
+        z: Z coordinate(s)
+        returns a tuple of isometric (x, y) coordinates (works on scalars as well as on numpy arrays)
         """
-        leaningFactor = 0.65
-        iso_x = (x - y) * leaningFactor
+        iso_x = (x - y) * LEANING_FACTOR
         iso_y = (x + y) / 2 - z
         return iso_x, iso_y
 
-    def drawFaces(self, screen):       
+    def drawFaces(self, screen, cameraZ=0):
         """
         draws the faces of the platform
+
+        cameraZ: height of the camera, subtracted from the z coordinates before projecting
         """
+        # converting every vertex to isometric projection at once and adding some padding so they get centered
+        projected = projectVertices(self.renderVertices) + getScreenOffset(cameraZ)
+
         for face, color in zip(self.faces, self.colors):
-            # make an array with each faces' vertices
-            vertices = [self.vertices[i] for i in face]
-            # converting them to isometric projection
-            iso_vertices = [self.convertToIsometric(x * ISO_MULTIPLIER, y * ISO_MULTIPLIER, z * ISO_MULTIPLIER) 
-                            for x, y, z in vertices]
-            # adding some padding so they get centered
-            iso_vertices = [(x + WINDOW_WIDTH // 2, y + WINDOW_HEIGHT // 2) for x, y in iso_vertices]
+            iso_vertices = projected[list(face)]
 
             # draw the face if it's visible
-            if any(0 <= x < WINDOW_WIDTH and 0 <= y < WINDOW_HEIGHT for x, y in iso_vertices):
+            if ((iso_vertices >= 0) & (iso_vertices < (WINDOW_WIDTH, WINDOW_HEIGHT))).all(axis=1).any():
                 pygame.draw.polygon(screen, color, iso_vertices)
 
-    def drawTargetEdges(self, screen):
+    def drawTargetEdges(self, screen, cameraZ=0):
         """
         draws the edges of the platform
+
+        cameraZ: height of the camera, subtracted from the z coordinates before projecting
         """
+        # apply isometric projection to every vertex at once
+        projected = projectVertices(self.final_vertices) + getScreenOffset(cameraZ)
+
         for edge in self.edges:
-            # get the 3D coords from 2 vertices
-            x1, y1, z1 = self.final_vertices[edge[0]]
-            x2, y2, z2 = self.final_vertices[edge[1]]
-            
-            # apply isometric projection to both vertices
-
-            iso_x1, iso_y1 = self.convertToIsometric(x1 * ISO_MULTIPLIER, y1 * ISO_MULTIPLIER, z1 * ISO_MULTIPLIER)
-            iso_x2, iso_y2 = self.convertToIsometric(x2 * ISO_MULTIPLIER, y2 * ISO_MULTIPLIER, z2 * ISO_MULTIPLIER)
-            
-            iso_x1 += WINDOW_WIDTH // 2
-            iso_y1 += WINDOW_HEIGHT // 2
-            iso_x2 += WINDOW_WIDTH // 2
-            iso_y2 += WINDOW_HEIGHT // 2
-
-            pygame.draw.line(screen, (255, 255, 255), (iso_x1, iso_y1), (iso_x2, iso_y2), 2)
+            pygame.draw.line(screen, (255, 255, 255), projected[edge[0]], projected[edge[1]], 2)
 
     def align(self, lastPlat):
         """
         aligns the platform with the last platform
         
         lastPlat: the last platform object to align with
-        perfectPlacement: boolean indicating if the placement is perfect
-        refPointIndex: the index of the reference point for alignment
         """
-
-        refPoint = self.final_vertices[DEFAULTALIGNINDEX]
-
-        targetPoint = lastPlat.final_vertices[DEFAULTALIGNINDEX]
-
         # calculate offsets to align bottom-left corners
-        xOffset = targetPoint[0] - refPoint[0]
-        yOffset = targetPoint[1] - refPoint[1]
+        xOffset = lastPlat.final_box[0] - self.final_box[0]
+        yOffset = lastPlat.final_box[2] - self.final_box[2]
+
+        # calculate the offset to rest the platform on top of the last platform
+        zOffset = lastPlat.final_box[5] - self.final_box[4]
 
-        # apply the offset to all vertices
-        self.vertices[:, 0] += xOffset
-        self.vertices[:, 1] += yOffset
+        # apply the offset to the box
+        self.box[0:2] += xOffset
+        self.box[2:4] += yOffset
+        self.box[4:6] += zOffset
 
         # only apply the PLATCENTEROFFSET for moving platforms
         if(self.moving):
             if self.direction == 0:
-                self.vertices[:, 0] -= PLATCENTEROFFSET
+                self.box[0:2] -= PLATCENTEROFFSET
             elif self.direction == 1:
-                self.vertices[:, 1] -= PLATCENTEROFFSET
+                self.box[2:4] -= PLATCENTEROFFSET
 
-        self.final_vertices = self.vertices.copy()
+        self.final_box = self.box.copy()
+        self.resetMotion()
 
     def perfectAlign(self, lastPlat):
         """
@@ -258,19 +302,58 @@ class Platform:
         # stop the moving animation if it's in progress
         self.moving = False
 
-        # 
-        refPoint = self.final_vertices[DEFAULTALIGNINDEX]
-        targetPoint = lastPlat.final_vertices[DEFAULTALIGNINDEX]
-
         # calculate offsets to align bottom-left corners
-        xOffset = targetPoint[0] - refPoint[0]
-        yOffset = targetPoint[1] - refPoint[1]
+        xOffset = lastPlat.final_box[0] - self.final_box[0]
+        yOffset = lastPlat.final_box[2] - self.final_box[2]
 
-        # apply the offset to all vertices
-        self.vertices[:, 0] += xOffset
-        self.vertices[:, 1] += yOffset
+        # apply the offset to the box
+        self.box[0:2] += xOffset
+        self.box[2:4] += yOffset
+
+        self.final_box = self.box.copy()
+
+    def clipTo(self, lastPlat):
+        """
+        trims the platform's box to the part that overlaps the last platform
+
+        lastPlat: the last platform object to trim against
+        """
+        x0, x1, y0, y1 = self.box[0:4]
+        lx0, lx1, ly0, ly1 = lastPlat.box[0:4]
 
-        self.final_vertices = self.vertices.copy()
+        self.box[0:4] = (min(max(x0, lx0), lx1), min(max(x1, lx0), lx1),
+                         min(max(y0, ly0), ly1), min(max(y1, ly0), ly1))
+
+    def resetMotion(self):
+        """starts the platform's movement from where its box is now"""
+        self.moveTime = 0
+        self.origin = self.box[self.direction * 2] if self.direction in (0, 1) else 0
+
+    def getPositionAt(self, time):
+        """
+        gets where the box's leading side is after moving for the given time,
+        bouncing back and forth between -PLATCENTEROFFSET and PLATCENTEROFFSET (a triangle wave)
+
+        time: seconds since the platform started moving
+        """
+        span = 2 * PLATCENTEROFFSET
+
+        # distance along the path unfolded at the bounces, which repeats every 2 spans
+        distance = (self.origin + PLATCENTEROFFSET + self.velocity * max(time, 0)) % (2 * span)
+        return (distance if distance <= span else 2 * span - distance) - PLATCENTEROFFSET
+
+    def moveTo(self, time):
+        """
+        puts the moving platform where it is after moving for the given time
+
+        time: seconds since the platform started moving
+        """
+        if(self.moving and self.direction in (0, 1)):
+            # the platform moves along x (direction 0) or y (direction 1)
+            low = self.direction * 2
+            self.box[low:low + 2] += self.getPositionAt(time) - self.box[low]
+
+            self.final_box = self.box.copy()
 
     def update(self, delta_time):
         """
@@ -278,40 +361,11 @@ class Platform:
         
         delta_time: time elapsed since the last update
         """
-        if(self.moving):
-            if(self.direction == 1):
-                self.vertices[:, 1] += self.velocity * delta_time
-
-                x1, y1, z1 = self.vertices[1]
-
-                if (y1 > PLATCENTEROFFSET):
-                    # reset position to boundary and reverse direction
-                    offset = y1 - PLATCENTEROFFSET
-                    self.vertices[:, 1] -= offset
-                    self.velocity *= -1
-                elif (y1 < -PLATCENTEROFFSET):
-                    # reset position to boundary and reverse direction
-                    offset = -PLATCENTEROFFSET - y1
-                    self.vertices[:, 1] += offset
-                    self.velocity *= -1
-
-            elif(self.direction == 0):
-                self.vertices[:, 0] += self.velocity * delta_time
-
-                x1, y1, z1 = self.vertices[1]
-
-                if (x1 > PLATCENTEROFFSET):
-                    # reset position to boundary and reverse direction
-                    offset = x1 - PLATCENTEROFFSET
-                    self.vertices[:, 0] -= offset
-                    self.velocity *= -1
-                elif (x1 < -PLATCENTEROFFSET):
-                    # reset position to boundary and reverse direction
-                    offset = -PLATCENTEROFFSET - x1
-                    self.vertices[:, 0] += offset
-                    self.velocity *= -1
-
-            self.final_vertices = self.vertices.copy()
+        if(self.moving and self.direction in (0, 1)):
+            self.previous_box = self.box.copy()
+
+            self.moveTime += delta_time
+            self.moveTo(self.moveTime)
 
         if(self.expanding):
             if self.expand_progress < 1.0:
@@ -321,53 +375,63 @@ class Platform:
                 # use the existing ease_in_out function from utils.py
                 smooth_t = ease_in_out(self.expand_progress)
 
-                # instead of animating all vertices, only animate the face that's expanding
-                if self.direction == 0:  # expanding width (right face)
-                    if(self.expandDirection == 1): # expanding visible face
-                        right_face = self.getFaces()[5] # visible right face
-
-                        for i in right_face:
-                            # only animate the x coordinate
-                            self.vertices[i, 0] = self.initial_vertices[i, 0] + (self.final_vertices[i, 0] - self.initial_vertices[i, 0]) * smooth_t
-                    elif(self.expandDirection == -1): # expanding non visible face
-                        left_face = self.getFaces()[0] # not visible left face
-
-                        for i in left_face:
-                            # only animate the x coordinate
-                            self.vertices[i, 0] = self.initial_vertices[i, 0] + (self.final_vertices[i, 0] - self.initial_vertices[i, 0]) * smooth_t
-
-                elif self.direction == 1:  # expanding depth (left face) 
-                    if(self.expandDirection == 1): # expanding visible face
-                        left_face = self.getFaces()[4] # visible left face
-
-                        for i in left_face:
-                            # only animate the y coordinate
-                            self.vertices[i, 1] = self.initial_vertices[i, 1] + (self.final_vertices[i, 1] - self.initial_vertices[i, 1]) * smooth_t
-                    elif(self.expandDirection == -1): # expanding non visible face
-                        right_face = self.getFaces()[1] # not visible right face
-
-                        for i in right_face:
-                            # only animate the y coordinate
-                            self.vertices[i, 1] = self.initial_vertices[i, 1] + (self.final_vertices[i, 1] - self.initial_vertices[i, 1]) * smooth_t
+                # only animate the side of the box that's expanding
+                # (x1 / y1 is the visible face, x0 / y0 the non visible one)
+                side = self.getExpandingSide()
+                self.box[side] = self.initial_box[side] + (self.final_box[side] - self.initial_box[side]) * smooth_t
                     
             else:
-                # when animation completes, make sure we're exactly at final positions
-                if self.direction == 0:  # width expansion
-                    right_face = self.getFaces()[5] # visible right face
-                    for i in right_face:
-                        self.vertices[i, 0] = self.final_vertices[i, 0]
-                elif self.direction == 1:  # depth expansion  
-                    left_face = self.getFaces()[4] # visible left face
-                    for i in left_face:
-                        self.vertices[i, 1] = self.final_vertices[i, 1]
+                # when animation completes, make sure we're exactly at the final box
+                self.box = self.final_box.copy()
                 
                 self.expanding = False
                 self.expand_timer = 0
                 self.expand_progress = 0
 
-    def draw(self, screen):
-        self.drawFaces(screen)
-        #self.drawTargetEdges(screen)
+    def interpolate(self, alpha):
+        """
+        sets the box the platform is drawn with between the last two simulation steps
+
+        alpha: how far the frame is between the previous step (0) and the current one (1)
+        """
+        if self.moving and self.previous_box is not None:
+            self.render_box = self.previous_box + (self.box - self.previous_box) * alpha
+        else:
+            self.render_box = None
+
+    def getExpandingSide(self):
+        """
+        returns the index in the box of the side that's being expanded
+        """
+        low = self.direction * 2 # x0 when expanding the width, y0 when expanding the depth
+        return low + 1 if self.expandDirection == 1 else low
+
+    def getScreenRect(self, cameraZ=0):
+        """
+        gets the part of the window the platform covers
+
+        cameraZ: height of the camera
+        returns a pygame.Rect around the projected platform
+        """
+        projected = projectVertices(self.renderVertices) + getScreenOffset(cameraZ)
+        (left, top), (right, bottom) = projected.min(axis=0), projected.max(axis=0)
+        return pygame.Rect(int(left) - 1, int(top) - 1, int(right - left) + 3, int(bottom - top) + 3)
+
+    def getDirtyRects(self, cameraZ=0):
+        """
+        returns the parts of the window the platform changes this frame (where it was and where it is)
+
+        cameraZ: height of the camera
+        """
+        rect = self.getScreenRect(cameraZ)
+        if rect == self.lastDrawnRect:
+            return []
+        return [rect] if self.lastDrawnRect is None else [self.lastDrawnRect, rect]
+
+    def draw(self, screen, cameraZ=0):
+        self.lastDrawnRect = self.getScreenRect(cameraZ)
+        self.drawFaces(screen, cameraZ)
+        #self.drawTargetEdges(screen, cameraZ)
 
     @staticmethod
     def calculateDimensions(plat):
@@ -377,23 +441,13 @@ class Platform:
         plat: the platform object
         returns a tuple of the platform's width, height, and depth
         """
-        
-        x0, y0, z0 = plat.final_vertices[0]
-        
-        # for width calculation
-        x4 = plat.final_vertices[4][0]
-        
-        # for height calculation
-        z1 = plat.final_vertices[1][2]
-        
-        # for depth calculation
-        y2 = plat.final_vertices[2][1]
+        x0, x1, y0, y1, z0, z1 = plat.final_box
 
-        width = abs(x4 - x0)
+        width = abs(x1 - x0)
 
         height = abs(z1 - z0)
 
-        depth = abs(y2 - y0)
+        depth = abs(y1 - y0)
 
         return round(width, DECIMALPLACES), round(height, DECIMALPLACES), round(depth, DECIMALPLACES)
 
@@ -403,144 +457,56 @@ class Platform:
         the platform stays within the maximum allowed bounds
         """
 
-        # round all vertices to the specified number of decimal places
-        self.vertices = np.round(self.vertices, DECIMALPLACES)
+        # round the box to the specified number of decimal places
+        self.box = np.round(self.box, DECIMALPLACES)
+
+        # set up expansion variables
+        self.initial_box = self.box.copy()
+        self.final_box = self.box.copy()
 
         # calculate current dimensions
         current_width, _, current_depth = self.calculateDimensions(self)
 
-        # set up expansion variables
-        self.initial_vertices = self.vertices.copy()
-        self.final_vertices = self.vertices.copy()
-
         self.expandDirection = 0 # 0 means no expansion, 1 means expanding a visible face, -1 means expanding an non visible face
-                
-        # define faces for expansion
-        if self.direction == 0:  # width expansion (X axis)
-            # check if it's already at maximum width
-            if current_width >= MAXBASESIDE:
-                self.expanding = False
-                self.expandDirection = 0
-                return self.width, self.depth, self.expanding
-                    
-            right_face = self.getFaces()[5] # visible right face
-            left_face = self.getFaces()[0] # not visible left face
-                        
-            # check if expanding would push any vertex beyond max bounds
-            proposed_expansion = self.final_vertices.copy()
-            
-            # try to expand the visible face first
-            right_expansion_safe = True
-
-            for index in right_face:
-                if(proposed_expansion[index, 0] >= MAXBASESIDE):
-                    right_expansion_safe = False
-                    break
-            
-            if right_expansion_safe: # if expanding right face is safe, then expand it
-                self.expandDirection = 1
-                # apply the expansion
-                for i in right_face:
-                    expandAmount = self.final_vertices[i, 0] + EXPANDAMOUNT
-
-                    if(expandAmount + EXPAND_MARGIN >= MAXBASESIDE): # if expanding would exceed bounds, then set it to the maximum
-                        self.final_vertices[i, 0] = MAXBASESIDE
-                    else: # otherwise, expand it
-                        self.final_vertices[i, 0] = round(expandAmount, DECIMALPLACES)
-
-            else: # if expanding right face would exceed bounds, try left face
-                proposed_expansion = self.final_vertices.copy()
-
-                left_expansion_safe = True
-
-                for index in left_face:
-                    if(proposed_expansion[index, 0] <= 0):
-                        left_expansion_safe = False
-                        break
-
-                if left_expansion_safe: # if expanding left face is safe, then expand it
-                    self.expandDirection = -1
-
-                    for i in left_face:
-                        expandAmount = self.final_vertices[i, 0] - EXPANDAMOUNT
-
-                        if(expandAmount - EXPAND_MARGIN <= 0): # if expanding would exceed bounds, then set it to the minimum
-                            self.final_vertices[i, 0] = 0
-                        else: # otherwise, expand it
-                            self.final_vertices[i, 0] = round(expandAmount, DECIMALPLACES)
-
-                else: # if expanding right and left face would exceed bounds, then dont expand it
-                    self.expanding = False
-                    return self.width, self.depth, self.expanding
-        
-        else:  # depth expansion (Y axis)
 
-            # check if already at maximum depth
-            if current_depth >= MAXBASESIDE:
-                self.expanding = False
-                self.expandDirection = 0
-                return self.width, self.depth, self.expanding
-                
-            left_face = self.getFaces()[4] # visible left face
-            right_face = self.getFaces()[1] # not visible right face
-                        
-            # check if expanding would push any vertex beyond max bounds
-            proposed_expansion = self.final_vertices.copy()
-
-            # try to expand the visible face first
-            left_expansion_safe = True
-
-            for index in left_face:
-                if(proposed_expansion[index, 1] >= MAXBASESIDE):
-                    left_expansion_safe = False
-                    break
-            
-            if left_expansion_safe: # if expanding the left face is safe, then expand it
-                self.expandDirection = 1
-                
-                # apply the expansion
-                for i in left_face:
-                    expandAmount = self.final_vertices[i, 1] + EXPANDAMOUNT
-
-                    if(expandAmount + EXPAND_MARGIN >= MAXBASESIDE): # if expanding would exceed bounds, then set it to the maximum
-                        self.final_vertices[i, 1] = MAXBASESIDE
-                    else: # otherwise, expand it
-                        self.final_vertices[i, 1] = round(expandAmount, DECIMALPLACES)
-
-            else: # if expanding the left face would exceed bounds, try right face
-
-                proposed_expansion = self.final_vertices.copy()
-
-                right_expansion_safe = True
-
-                for index in right_face:
-                    if(proposed_expansion[index, 1] <= 0):
-                        right_expansion_safe = False
-                        break
-
-                if right_expansion_safe: # if expanding right face is safe, then expand it
-                    self.expandDirection = -1
-                    
-                    # apply the expansion
-                    for i in right_face:
-                        expandAmount = self.final_vertices[i, 1] - EXPANDAMOUNT
-
-                        if(expandAmount - EXPAND_MARGIN <= 0): # if expanding would exceed bounds, then set it to the minimum
-                            self.final_vertices[i, 1] = 0
-                        else: # otherwise, expand it
-                            self.final_vertices[i, 1] = round(expandAmount, DECIMALPLACES)
-
-                else: # if expanding right face would exceed bounds, then dont expand it
-                    self.expanding = False
-                    self.expandDirection = 0
-                    return self.width, self.depth, self.expanding
+        # width expansion moves x0 / x1, depth expansion moves y0 / y1
+        current_side = current_width if self.direction == 0 else current_depth
+        low = self.direction * 2
+        high = low + 1
+
+        # check if it's already at the maximum size
+        if current_side >= MAXBASESIDE:
+            self.expanding = False
+            return self.width, self.depth, self.expanding
+
+        if self.final_box[high] < MAXBASESIDE: # if expanding the visible face is safe, then expand it
+            self.expandDirection = 1
+            expandAmount = self.final_box[high] + EXPANDAMOUNT
+
+            if(expandAmount + EXPAND_MARGIN >= MAXBASESIDE): # if expanding would exceed bounds, then set it to the maximum
+                self.final_box[high] = MAXBASESIDE
+            else: # otherwise, expand it
+                self.final_box[high] = round(expandAmount, DECIMALPLACES)
+
+        elif self.final_box[low] > 0: # if expanding the visible face would exceed bounds, try the non visible one
+            self.expandDirection = -1
+            expandAmount = self.final_box[low] - EXPANDAMOUNT
+
+            if(expandAmount - EXPAND_MARGIN <= 0): # if expanding would exceed bounds, then set it to the minimum
+                self.final_box[low] = 0
+            else: # otherwise, expand it
+                self.final_box[low] = round(expandAmount, DECIMALPLACES)
+
+        else: # if expanding either face would exceed bounds, then dont expand it
+            self.expanding = False
+            return self.width, self.depth, self.expanding
         
         self.expanding = True
         self.expand_timer = 0
         self.expand_progress = 0
         
-        # round all final vertices to the specified number of decimal places
-        self.final_vertices = np.round(self.final_vertices, DECIMALPLACES)
+        # round the final box to the specified number of decimal places
+        self.final_box = np.round(self.final_box, DECIMALPLACES)
 
         self.width, self.height, self.depth = self.calculateDimensions(self)
         return self.width, self.depth, self.expandDirection
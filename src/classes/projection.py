@@ -0,0 +1,35 @@
+import numpy as np
+
+from constants import *
+
+LEANING_FACTOR = 0.65 # horizontal squash of the isometric projection
+
+# isometric projection of (x, y, z) to (iso_x, iso_y), scaled by ISO_MULTIPLIER
+# iso_x = (x - y) * leaningFactor
+# iso_y = (x + y) / 2 - z
+ISO_PROJECTION = np.array([
+    [LEANING_FACTOR, 0.5],
+    [-LEANING_FACTOR, 0.5],
+    [0, -1]
+]) * ISO_MULTIPLIER
+
+def projectVertices(vertices):
+    """
+    projects any number of vertices with a single matrix multiply (the result doesn't depend on the camera)
+
+    vertices: array of (x, y, z) coordinates, shaped (..., 3)
+    returns an array of isometric (x, y) coordinates, shaped (..., 2)
+    """
+    return vertices @ ISO_PROJECTION
+
+def getScreenOffset(cameraZ=0, yOffset=0):
+    """
+    gets the offset that moves projected vertices to the window for the given camera height
+
+    cameraZ: height of the camera
+    yOffset: vertical offset of the target surface relative to the window
+    returns an array of the (x, y) offset
+    """
+    # raising the camera moves everything down by the projected height (z only affects iso_y)
+    # snapped to whole pixels, so every layer (the baked tower, the live platforms) scrolls by the same amount
+    return np.array([WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + yOffset + round(cameraZ * ISO_MULTIPLIER)])
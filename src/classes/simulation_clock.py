@@ -0,0 +1,52 @@
+import pygame
+
+from constants import *
+
+class SimulationClock:
+    def __init__(self, hz=SIMULATION_HZ, maxSteps=MAX_SIMULATION_STEPS):
+        """
+        splits the time between frames into fixed simulation steps
+
+        hz: number of simulation steps per second
+        maxSteps: maximum number of steps simulated in one frame (the rest of the time is dropped so slow frames can't snowball)
+        """
+        self.step = 1 / hz # duration of a step in seconds
+        self.maxSteps = maxSteps
+        self.accumulator = 0 # time that hasn't been simulated yet
+        self.ticks = pygame.time.get_ticks() # moment (in pygame ticks) the simulation and the accumulator are caught up to
+
+    def advance(self, frameTime):
+        """
+        adds the frame's time to the clock
+
+        frameTime: time elapsed since the last frame in seconds
+        returns the number of steps to simulate
+        """
+        self.accumulator += frameTime
+
+        steps = int(self.accumulator // self.step)
+        if steps > self.maxSteps:
+            steps = self.maxSteps
+            self.accumulator = self.step * steps # drop the time that can't be caught up with
+
+        self.accumulator -= steps * self.step
+        self.ticks = pygame.time.get_ticks()
+        return steps
+
+    def getAlpha(self):
+        """returns how far the frame is between the last two simulation steps (0 to 1), for interpolating the rendering"""
+        return min(1.0, self.accumulator / self.step)
+
+    def getTimeAt(self, ticks):
+        """
+        converts a moment to simulation time
+
+        ticks: the moment in milliseconds (from pygame.time.get_ticks)
+        returns the time from the last simulation step to that moment in seconds (at most what one frame can simulate)
+        """
+        time = self.accumulator + (ticks - self.ticks) / 1000
+        return min(max(time, 0), self.step * self.maxSteps)
+
+    def reset(self):
+        self.accumulator = 0
+        self.ticks = pygame.time.get_ticks()
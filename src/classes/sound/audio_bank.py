@@ -0,0 +1,87 @@
+import json
+import mmap
+import struct
+
+import pygame
+
+# header of the bank: magic, mixer frequency, mixer sample format, number of channels, size of the index
+HEADER = struct.Struct("<8sihhI")
+MAGIC = b"SFXBANK1"
+ALIGNMENT = 16 # the sample data starts on a multiple of this many bytes
+
+class AudioBank:
+    def __init__(self, path):
+        """
+        memory maps a bank of pre-decoded sound effects (built by build_audio_bank.py)
+
+        path: path of the bank file
+        raises OSError if the file can't be opened and ValueError if it isn't a valid bank
+        """
+        self.file = open(path, "rb")
+        self.data = None
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, frequency, sample_format, channels, index_size = HEADER.unpack_from(self.data)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an audio bank")
+
+            self.mixer_format = (frequency, sample_format, channels) # format the samples were decoded to
+            self.index = json.loads(bytes(self.data[HEADER.size:HEADER.size + index_size])) # category -> name -> (offset, length)
+            self.data_start = AudioBank.align(HEADER.size + index_size)
+        except (struct.error, ValueError):
+            self.close()
+            raise ValueError(f"{path} is not a valid audio bank")
+
+    @staticmethod
+    def align(offset):
+        return -(-offset // ALIGNMENT) * ALIGNMENT
+
+    @staticmethod
+    def write(path, mixer_format, categories):
+        """
+        packs decoded sounds into a bank file
+
+        path: path of the bank file
+        mixer_format: (frequency, sample format, channels) of the mixer the sounds were decoded with
+        categories: dictionary of category -> list of (file name, pygame.mixer.Sound)
+        """
+        index = {}
+        samples = []
+        offset = 0
+        for category, sounds in categories.items():
+            index[category] = {}
+            for name, sound in sounds:
+                raw = sound.get_raw()
+                index[category][name] = (offset, len(raw))
+                samples.append(raw)
+                offset += len(raw)
+
+        index_data = json.dumps(index).encode("utf-8")
+        header = HEADER.pack(MAGIC, *mixer_format, len(index_data))
+
+        with open(path, "wb") as file:
+            file.write(header)
+            file.write(index_data)
+            file.write(bytes(AudioBank.align(len(header) + len(index_data)) - len(header) - len(index_data))) # padding
+            for raw in samples:
+                file.write(raw)
+
+    def matches(self, mixer_format):
+        """check if the bank was built for the given mixer format (as returned by pygame.mixer.get_init)"""
+        return tuple(mixer_format) == self.mixer_format
+
+    def has_sound(self, category, name):
+        return name in self.index.get(category, {})
+
+    def get_sound(self, category, name):
+        """create a sound from its samples in the bank (no decoding, the samples are copied into the sound)"""
+        offset, length = self.index[category][name]
+        start = self.data_start + offset
+        with memoryview(self.data)[start:start + length] as samples:
+            return pygame.mixer.Sound(buffer=samples)
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self.file.close()
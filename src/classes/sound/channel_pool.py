@@ -0,0 +1,67 @@
+import pygame
+
+class ChannelPool:
+    def __init__(self, groups):
+        """
+        reserves mixer channels for each sound category, so a burst of one category can't cut off the others
+
+        groups: dictionary of category -> number of channels
+        """
+        total = sum(groups.values())
+        pygame.mixer.set_num_channels(max(total, pygame.mixer.get_num_channels()))
+        pygame.mixer.set_reserved(total) # Sound.play() won't pick these channels
+
+        self.channels = {} # channels of each category
+        self.voices = {} # (priority, play order) of the sound on each channel of each category
+        first = 0
+        for name, size in groups.items():
+            self.channels[name] = [pygame.mixer.Channel(i) for i in range(first, first + size)]
+            self.voices[name] = [(0, 0)] * size
+            first += size
+
+        self.play_count = 0
+        self.master_volume = 1.0
+        self.bus_volumes = dict.fromkeys(groups, 1.0) # volume of each category, on top of the master volume
+
+    def play(self, group, sound, priority=0):
+        """
+        play a sound on a channel of its category, replacing the least important sound if they're all busy
+        (the lowest priority, then the oldest)
+
+        group: category of the sound
+        sound: the pygame.mixer.Sound to play
+        priority: importance of the sound, it never replaces a sound with a higher priority
+        returns the channel the sound plays on, or None if it was dropped
+        """
+        channels = self.channels[group]
+        voices = self.voices[group]
+
+        index = next((i for i, channel in enumerate(channels) if not channel.get_busy()), None)
+        if index is None:
+            index = min(range(len(channels)), key=voices.__getitem__) # voice stealing
+            if voices[index][0] > priority:
+                return None
+
+        self.play_count += 1
+        voices[index] = (priority, self.play_count)
+        channels[index].play(sound)
+        return channels[index]
+
+    def set_master_volume(self, volume):
+        """set the volume of every category (0.0 to 1.0)"""
+        if volume != self.master_volume:
+            self.master_volume = volume
+            for group in self.channels:
+                self._apply_volume(group)
+
+    def set_bus_volume(self, group, volume):
+        """set the volume of a category (0.0 to 1.0)"""
+        if volume != self.bus_volumes[group]:
+            self.bus_volumes[group] = volume
+            self._apply_volume(group)
+
+    def _apply_volume(self, group):
+        """set the volume of the category's channels (they keep it for every sound they play)"""
+        volume = self.master_volume * self.bus_volumes[group]
+        for channel in self.channels[group]:
+            channel.set_volume(volume)
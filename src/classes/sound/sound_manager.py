@@ -1,11 +1,21 @@
 import pygame
+import numpy as np
 import random
-import os
+import time
 from constants import *
+from classes.sound.audio_bank import AudioBank
+from classes.sound.channel_pool import ChannelPool
+from utils.system_utils import getAssetPath, getSoundFiles
 
 class Sound:
-    def __init__(self):
-        """initialize sound manager with empty sound collections and default settings"""
+    def __init__(self, loader=None):
+        """
+        initialize sound manager with empty sound collections and default settings
+
+        loader: asset loader that decodes the sounds in the background (they're loaded synchronously without one)
+        """
+        self.loader = loader
+
         # sound collections
         self.normal_stack_sfx = []
         self.perfect_stack_sfx = []
@@ -13,6 +23,7 @@ class Sound:
         self.pause_game_sfx = []
         self.resume_game_sfx = []
         self.button_click_sfx = []
+        self.perfect_stack_pitches = {} # perfect stack sounds generated from the base sample, by number of semitones
         
         # sound settings
         self.master_volume = 1.0
@@ -21,14 +32,27 @@ class Sound:
         
         # initialize mixer if not already initialized
         self.sound_available = self._initialize_mixer()
+        self.bank = self._open_bank() if self.sound_available else None # pre-decoded sounds
+        self.channels = ChannelPool(SFX_CHANNEL_GROUPS) if self.sound_available else None # every sound plays on its category's channels
         
-        if self.sound_available:
-            self.load_all_sounds()
+        if self.sound_available and loader is None:
+            self.load_all_sounds() # with a loader, this is called once loading is done
+    
+    @staticmethod
+    def pre_init(profile=AUDIO_PROFILE):
+        """
+        set the mixer's format before pygame.init() initializes it (must be called before pygame.init())
+
+        profile: name of the audio profile in AUDIO_PROFILES (a smaller buffer plays sounds sooner after play())
+        """
+        settings = AUDIO_PROFILES[profile]
+        pygame.mixer.pre_init(settings["frequency"], settings["size"], settings["channels"], settings["buffer"])
     
     def _initialize_mixer(self):
         """initialize the pygame mixer"""
         try:
             if not pygame.mixer.get_init():
+                Sound.pre_init()
                 pygame.mixer.init()
             return True
         except pygame.error as e:
@@ -41,70 +65,108 @@ class Sound:
     
     def load_all_sounds(self):
         """load all game sound effects"""
-        self._load_sounds("normalStack", self.normal_stack_sfx, NUM_NORMAL_STACK_SFX)
-        self._load_sounds("perfectStack", self.perfect_stack_sfx, NUM_PERFECT_STACK_SFX)
-        self._load_sounds("expandPlatform", self.expand_sfx, NUM_EXPAND_SFX)
-        self._load_sounds("pauseGame", self.pause_game_sfx, NUM_PAUSE_GAME_SFX)
-        self._load_sounds("resumeGame", self.resume_game_sfx, NUM_RESUME_GAME_SFX)
-        self._load_sounds("buttonClick", self.button_click_sfx, NUM_BUTTON_CLICK_SFX)
+        self._load_sounds("normalStack", self.normal_stack_sfx)
+        self._load_sounds("perfectStack", self.perfect_stack_sfx)
+        self._load_sounds("expandPlatform", self.expand_sfx)
+        self._load_sounds("pauseGame", self.pause_game_sfx)
+        self._load_sounds("resumeGame", self.resume_game_sfx)
+        self._load_sounds("buttonClick", self.button_click_sfx)
+        
+        # the sounds have their own copy of the samples
+        if self.bank is not None:
+            self.bank.close()
+            self.bank = None
         
         # apply current volume settings to all loaded sounds
         self.update_all_volumes()
     
-    def _load_sounds(self, folder_name, sound_list, count):
-        """load sounds from the specified folder into the provided list"""
-        base_path = f"assets/SFX/{folder_name}"
-        
-        # map of filename patterns for each sound category
-        filename_patterns = {
-            "normalStack": "stack{}.wav",
-            "perfectStack": "perfect{}.wav",
-            "expandPlatform": "expand{}.wav",
-            "pauseGame": "pause{}.wav",
-            "resumeGame": "resume{}.wav",
-            "buttonClick": "click{}.wav"
-        }
-        
-        # get the correct filename pattern for this folder
-        pattern = filename_patterns.get(folder_name, "{}{}.wav".format(folder_name.lower(), "{}"))
-        
-        for i in range(1, count + 1):
-            try:
-                # get the full path of the sound file
-                file_name = f"{base_path}/{pattern.format(i)}"
-                
-                if os.path.exists(file_name):
-                    sound = pygame.mixer.Sound(file_name)
-                    sound_list.append(sound)
-                else:
-                    print(f"Sound file not found: {file_name}")
-            except pygame.error as e:
-                print(f"Error loading {file_name}: {e}")
+    def _load_sounds(self, folder_name, sound_list):
+        """load the sounds listed in the asset manifest for the specified folder into the provided list"""
+        for name in getSoundFiles(folder_name):
+            sound = self._load_sound(folder_name, name)
+            if sound is not None:
+                sound_list.append(sound)
+    
+    def _load_sound(self, folder_name, name):
+        """load one sound from the audio bank, the asset loader or its .wav file (in that order)"""
+        if self.bank is not None and self.bank.has_sound(folder_name, name):
+            return self.bank.get_sound(folder_name, name)
+        
+        file_name = getAssetPath("SFX", folder_name, name)
+        if self.loader is not None:
+            return self.loader.get("sound", file_name)
+        
+        try:
+            return pygame.mixer.Sound(file_name)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Error loading {file_name}: {e}")
+            return None
+    
+    def _open_bank(self):
+        """memory map the audio bank if it was built for the mixer's current format"""
+        try:
+            bank = AudioBank(getAssetPath(AUDIO_BANK))
+        except (OSError, ValueError):
+            return None # not built, the .wav files are used instead
+        
+        if not bank.matches(pygame.mixer.get_init()):
+            print(f"{AUDIO_BANK} was built for another mixer format, rebuild it with build_audio_bank.py")
+            bank.close()
+            return None
+        return bank
+    
+    def probe_latency(self, trials=AUDIO_PROBE_TRIALS):
+        """
+        measure the time between play() and the mixer consuming the sound, by playing a single silent sample
+
+        trials: number of measurements to average
+        returns the average latency in seconds (None without sound)
+        """
+        if not self.sound_available:
+            return None
+        
+        _, size, channels = pygame.mixer.get_init()
+        silence = pygame.mixer.Sound(buffer=bytes(abs(size) // 8 * channels)) # one frame of silence
+        
+        total = 0
+        for _ in range(trials):
+            start = time.perf_counter()
+            channel = self.channels.play("ui", silence, priority=AUDIO_PROBE_PRIORITY)
+            # the channel stops being busy once the mixer has mixed the sample into a buffer
+            while channel.get_busy() and time.perf_counter() - start < AUDIO_PROBE_TIMEOUT:
+                time.sleep(0.0002)
+            total += time.perf_counter() - start
+        
+        return total / trials
+    
+    def needs_decoding(self):
+        """check if the sounds have to be decoded from their .wav files"""
+        return self.sound_available and self.bank is None
+    
+    def _get_volume(self):
+        """get the volume sounds should play at"""
+        if self.muted:
+            return 0.0
+        return self.sfx_volume
     
     def update_all_volumes(self):
         """update volume level for all sounds based on current settings"""
         if not self.sound_available:
             return
             
-        if self.muted:
-            volume = 0.0
-        else:
-            volume = self.sfx_volume
-        
-        # apply volume to each sound category
-        for sound_list in [
-            self.normal_stack_sfx, self.perfect_stack_sfx, 
-            self.expand_sfx, self.pause_game_sfx, 
-            self.resume_game_sfx, self.button_click_sfx
-        ]:
-            for sound in sound_list:
-                sound.set_volume(volume)
+        # the volume is set on the channels rather than on every sound
+        self.channels.set_master_volume(self._get_volume())
     
     def set_sfx_volume(self, volume):
         """set SFX volume (0.0 to 1.0)"""
         self.sfx_volume = max(0.0, min(1.0, volume))
         self.update_all_volumes()
     
+    def set_category_volume(self, category, volume):
+        """set the volume of a category of sounds (0.0 to 1.0), see SFX_CHANNEL_GROUPS"""
+        if self.sound_available:
+            self.channels.set_bus_volume(category, max(0.0, min(1.0, volume)))
+    
     def toggle_mute(self):
         """toggle mute state"""
         self.muted = not self.muted
@@ -120,7 +182,7 @@ class Sound:
     def play_normal_stack(self):
         """Play a random normal stack sound effect"""
         if self.sound_available and self.normal_stack_sfx:
-            random.choice(self.normal_stack_sfx).play()
+            self.channels.play("stack", random.choice(self.normal_stack_sfx))
     
     def play_perfect_stack(self, counter=None):
         """Play perfect stack sound, either sequential or random"""
@@ -128,29 +190,62 @@ class Sound:
             return
             
         if counter is not None and counter > 0:
-            # play sounds sequentially based on counter
-            index = (counter - 1) % len(self.perfect_stack_sfx)
-            self.perfect_stack_sfx[index].play()
+            # the pitch rises with the streak, the oldest note is replaced when the channels are busy
+            self.channels.play("perfect", self.get_perfect_stack_sound(counter))
         else:
             # or just play a random one
-            random.choice(self.perfect_stack_sfx).play()
+            self.channels.play("perfect", random.choice(self.perfect_stack_sfx))
+    
+    def get_perfect_stack_sound(self, counter):
+        """get the sound of a perfect stack streak, pitched up from the base sample (generated on first use)"""
+        semitones = Sound._get_streak_semitones(counter)
+        
+        if semitones not in self.perfect_stack_pitches:
+            self.perfect_stack_pitches[semitones] = Sound._pitch_shift(self.perfect_stack_sfx[0], semitones)
+        
+        return self.perfect_stack_pitches[semitones]
+    
+    @staticmethod
+    def _get_streak_semitones(counter):
+        """get how many semitones above the base sample a streak plays (climbing a major scale, up to a maximum)"""
+        octave, degree = divmod(counter - 1, len(PERFECT_STACK_SCALE))
+        return min(12 * octave + PERFECT_STACK_SCALE[degree], PERFECT_STACK_MAX_SEMITONES)
+    
+    @staticmethod
+    def _pitch_shift(sound, semitones):
+        """resample a sound so it plays the given number of semitones higher (it gets shorter too)"""
+        if semitones == 0:
+            return sound
+        
+        samples = pygame.sndarray.array(sound)
+        ratio = 2 ** (semitones / 12)
+        
+        # linear interpolation between the original samples
+        positions = np.arange(0, len(samples) - 1, ratio)
+        indices = positions.astype(int)
+        fraction = positions - indices
+        if samples.ndim == 2: # one column per channel
+            fraction = fraction[:, None]
+        shifted = samples[indices] * (1 - fraction) + samples[indices + 1] * fraction
+        
+        return pygame.sndarray.make_sound(np.round(shifted).astype(samples.dtype))
     
     def play_expand(self):
         """play a random expand platform sound effect"""
         if self.sound_available and self.expand_sfx:
-            random.choice(self.expand_sfx).play()
+            self.channels.play("expand", random.choice(self.expand_sfx), priority=1)
     
     def play_pause_game(self):
         """play a random pause game sound effect"""
         if self.sound_available and self.pause_game_sfx:
-            random.choice(self.pause_game_sfx).play()
+            self.channels.play("ui", random.choice(self.pause_game_sfx))
     
     def play_resume_game(self):
         """play a random resume game sound effect"""
         if self.sound_available and self.resume_game_sfx:
-            random.choice(self.resume_game_sfx).play()
+            self.channels.play("ui", random.choice(self.resume_game_sfx))
     
     def play_button_click(self):
         """play a random button click sound effect"""
         if self.sound_available and self.button_click_sfx:
-            random.choice(self.button_click_sfx).play()
\ No newline at end of file
+            self.channels.play("ui", random.choice(self.button_click_sfx))
\ No newline at end of file
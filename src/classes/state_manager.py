@@ -9,6 +9,9 @@ class GameState(enum.Enum):
     SETTINGS = 4
     GAMEOVER = 5
 
+# states that only need to redraw when there's input or an animation running
+IDLE_STATES = [GameState.MENU, GameState.PAUSED, GameState.SETTINGS, GameState.GAMEOVER]
+
 class StateManager:
     def __init__(self, game):
         """initialize state manager"""
@@ -60,4 +63,8 @@ class StateManager:
 
     def isState(self, state):
         """check if current state matches given state"""
-        return self.current_state == state
\ No newline at end of file
+        return self.current_state == state
+
+    def isIdleState(self):
+        """check if the current state can drop its frame rate while nothing is animating"""
+        return self.current_state in IDLE_STATES
\ No newline at end of file
@@ -1,21 +1,44 @@
+import pygame
 import numpy as np
 
 from constants import *
 from utils.utils import ease_in_out
 
 from classes.gradient import Gradient
-from classes.platform import Platform
+from classes.platform import Platform, VISIBLE_FACES
+from classes.tower_geometry import TowerGeometry, getCorners
+from classes.projection import projectVertices, getScreenOffset
 
 class Tower:
     def __init__(self, num, initialColor): # number of platforms, color of the first platform
         self.numStartingPlats = num
         self.initialColor = initialColor
+        self.geometry = TowerGeometry() # contiguous storage for the geometry of every platform in the tower
         self.platforms = self.setupStartingPlatforms()
         self.t = -1 # time variable for the animation (-1 means the animation is not running, 0 to 1 means the animation is running)
         self.animationTime = 0.4 # time it takes for the animation to complete
 
-        self.initial_z_positions = []
-        self.final_z_positions = []
+        # the tower never moves, the camera does (platforms keep their world z and the offset is applied at projection time)
+        self.cameraZ = 0 # current height of the camera
+        self.initialCameraZ = 0 # height of the camera when the animation started
+        self.targetCameraZ = 0 # height the camera is moving to
+        self.previousCameraZ = 0 # height of the camera at the previous simulation step
+        self.renderCameraZ = 0 # height of the camera interpolated between the last two simulation steps
+
+        # only the platforms in this range can be inside the window (updated when the camera moves)
+        self.firstVisible = 0
+        self.lastVisible = len(self.platforms) - 1
+
+        # settled platforms are drawn once into an offscreen surface that gets blitted at the camera offset
+        self.bakedSurface = None
+        self.bakeCameraZ = 0 # height of the camera the baked surface was drawn for
+        self.bakedCount = 0 # platforms [0, bakedCount) are in the baked surface, the rest are drawn live
+
+        self.lastDrawnCameraZ = None # camera height of the last drawn frame, to know when the tower changes
+
+        # profiling counters for the last drawn frame
+        self.drawnCount = 0
+        self.culledCount = 0
 
     def setupStartingPlatforms(self): # setup the tower
         """
@@ -30,6 +53,7 @@ class Tower:
             platform = Platform(SBASEWIDTH, SBASEDEPTH, SPHEIGHT, 0, i, False, z_offset)
             
             platform.setup(Gradient.getGradientColorFrom((0, 0, 0), self.initialColor, self.numStartingPlats, i))
+            platform.attach(self.geometry)
             platforms.append(platform)
         
         return platforms
@@ -43,41 +67,61 @@ class Tower:
         
         plat.moving = False # the platform is no longer moving
         if(not plat.expanding):
-            plat.final_vertices = plat.vertices.copy()
+            plat.final_box = plat.box.copy()
+        plat.attach(self.geometry) # the platform becomes a view into the geometry store
         self.platforms.append(plat) # add the platform to the tower
 
-        shift_amount = plat.height # the amount the platform will be shifted down
-
-        self.initial_z_positions = [platform.vertices[:, 2].copy() for platform in self.platforms] # copy the z positions of the platforms
-        self.final_z_positions = [platform.vertices[:, 2].copy() - shift_amount for platform in self.platforms] # copy the shifted z positions of the platforms
+        # raise the camera by the platform's height instead of shifting every platform down
+        self.initialCameraZ = self.cameraZ
+        self.targetCameraZ += plat.height
 
         self.t = 0 # starts the animation
 
+        self.updateVisibleRange()
+
     def getNumPlats(self): # returns the amount of platforms that are in the tower (including the starting ones)
         return len(self.platforms)
 
     def getTowers(self): # returns the array of objects
         return self.platforms
 
-    def update(self, framerate, delta_time):
-        for plat in (self.platforms):
-            plat.update(delta_time)
-            
+    def update(self, delta_time):
+        self.previousCameraZ = self.cameraZ
+
+        # settled platforms never change, only the visible expanding ones need updating
+        expanding = self.geometry.getExpandingIndices(self.firstVisible, self.lastVisible + 1)
+        for i in expanding:
+            self.platforms[i].update(delta_time)
+        self.geometry.invalidateProjection(expanding)
+
         if self.t != -1: # if the animation is running
-            self.t += 1 / (framerate * self.animationTime) #increment the time variable
+            self.t += delta_time / self.animationTime #increment the time variable
 
             if self.t >= 1: # if the animation is finished
                 self.t = -1 # stop the animation
-                for i, platform in enumerate(self.platforms): # set the z positions of the platforms to the final z positions (to avoid floating point errors)
-                    platform.vertices[:, 2] = self.final_z_positions[i]
+                self.cameraZ = self.targetCameraZ # snap to the target (to avoid floating point errors)
             else: # if the animation is still running
                 eased_t = ease_in_out(self.t) # get the eased time
+                self.cameraZ = self.initialCameraZ + (self.targetCameraZ - self.initialCameraZ) * eased_t
+
+            self.updateVisibleRange()
+
+    def updateVisibleRange(self):
+        """
+        updates the range of platforms that can be inside the window for the current camera height
+        """
+        first, end = self.geometry.getVisibleRange(min(self.previousCameraZ, self.cameraZ)) # the interpolated camera can be a step behind
 
-                for i, platform in enumerate(self.platforms): # update the z positions of the platforms
-                    platform.vertices[:, 2] = self.initial_z_positions[i] + (self.final_z_positions[i] - self.initial_z_positions[i]) * eased_t
+        # platforms that scrolled out of the window won't be updated anymore, so finish their expansion right away
+        finished = self.geometry.getExpandingIndices(self.firstVisible, first)
+        for i in finished:
+            plat = self.platforms[i]
+            plat.box = plat.final_box.copy()
+            plat.expanding = False
+        self.geometry.invalidateProjection(finished)
 
-            for plat in self.platforms:
-                plat.final_vertices[:, 2] = plat.vertices.copy()[:, 2]
+        self.firstVisible = first
+        self.lastVisible = end - 1
 
     def getTrimming(self, currentPlat, lastPlat): # trim the current platform to fit the last platform
         def dynamicPerfectOffset(size):
@@ -96,16 +140,10 @@ class Tower:
             MAXPERFECTOFFSET = dynamicPerfectOffset(currentPlat.depth)
 
         # get the bounding box of the last platform
-        last_min_x = min(lastPlat.vertices[:, 0])
-        last_max_x = max(lastPlat.vertices[:, 0])
-        last_min_y = min(lastPlat.vertices[:, 1])
-        last_max_y = max(lastPlat.vertices[:, 1])
+        last_min_x, last_max_x, last_min_y, last_max_y = lastPlat.box[0:4]
 
         # get the bounding box of the current platform
-        curr_min_x = min(currentPlat.vertices[:, 0])
-        curr_max_x = max(currentPlat.vertices[:, 0])
-        curr_min_y = min(currentPlat.vertices[:, 1])
-        curr_max_y = max(currentPlat.vertices[:, 1])
+        curr_min_x, curr_max_x, curr_min_y, curr_max_y = currentPlat.box[0:4]
 
         # calculating the overlap between the two platforms
         overlap_x = max(0, min(last_max_x, curr_max_x) - max(last_min_x, curr_min_x))
@@ -136,6 +174,110 @@ class Tower:
     def getLastPlat(self): # returns the last platform in the tower
         return self.platforms[-1]
 
+    def drawPlatforms(self, surface, start, end, cameraZ, yOffset=0):
+        """
+        draws a range of the tower's platforms using their cached projections
+
+        surface: the surface to draw on
+        start: index of the first platform to draw
+        end: index to stop drawing at
+        cameraZ: height of the camera to project with
+        yOffset: vertical offset of the surface relative to the window
+        """
+        if start >= end:
+            return
+
+        # moving the projected platforms to the window for this camera height
+        projected = self.geometry.getProjected(start, end) + getScreenOffset(cameraZ, yOffset)
+
+        faces = projected[:, VISIBLE_FACES] # shape (platforms, faces, face vertices, 2)
+
+        # a face is drawn if any of its vertices is inside the surface
+        width, height = surface.get_size()
+        visible = ((faces[..., 0] >= 0) & (faces[..., 0] < width) &
+                   (faces[..., 1] >= 0) & (faces[..., 1] < height)).any(axis=2)
+
+        colors = self.geometry.colors[start:end]
+        for i, face in zip(*np.nonzero(visible)): # bottom to top, so upper platforms are drawn over lower ones
+            pygame.draw.polygon(surface, colors[i, face], faces[i, face])
+
+    def rebake(self, end):
+        """
+        redraws the baked surface from scratch for the current camera height
+
+        end: index to stop baking at
+        """
+        if self.bakedSurface is None:
+            self.bakedSurface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT + TOWER_BAKE_HEADROOM))
+            if pygame.display.get_surface() is not None:
+                self.bakedSurface = self.bakedSurface.convert() # match the display's pixel format for faster blits
+            # a run-length encoded colorkey blits a lot faster than per-pixel alpha
+            self.bakedSurface.set_colorkey(TOWER_BAKE_COLORKEY, pygame.RLEACCEL)
+
+        self.bakedSurface.fill(TOWER_BAKE_COLORKEY)
+        self.bakeCameraZ = round(self.renderCameraZ * ISO_MULTIPLIER) / ISO_MULTIPLIER # on the pixel grid, like the live platforms
+        self.drawPlatforms(self.bakedSurface, self.firstVisible, end, self.bakeCameraZ, TOWER_BAKE_HEADROOM)
+        self.bakedCount = end
+
+    def bakeSettledPlatforms(self):
+        """
+        adds the platforms that stopped animating to the baked surface
+        (only a contiguous run from the bottom is baked, so the drawing order stays bottom to top)
+        """
+        end = self.bakedCount
+        while end < self.geometry.count and not self.geometry.expanding[end]:
+            end += 1
+
+        # the camera moved past the headroom, so the surface has to be redrawn
+        if self.bakedSurface is None or (self.renderCameraZ - self.bakeCameraZ) * ISO_MULTIPLIER > TOWER_BAKE_HEADROOM:
+            self.rebake(end)
+            return
+
+        if end == self.bakedCount:
+            return
+
+        # the new platforms have to fit below the top of the surface
+        top = self.geometry.box[end - 1, 5]
+        if (top - self.bakeCameraZ) * ISO_MULTIPLIER > WINDOW_HEIGHT // 2 + TOWER_BAKE_HEADROOM:
+            self.rebake(end)
+            return
+
+        self.drawPlatforms(self.bakedSurface, self.bakedCount, end, self.bakeCameraZ, TOWER_BAKE_HEADROOM)
+        self.bakedCount = end
+
+    def interpolate(self, alpha):
+        """
+        sets the camera height the tower is drawn with between the last two simulation steps
+
+        alpha: how far the frame is between the previous step (0) and the current one (1)
+        """
+        self.renderCameraZ = self.previousCameraZ + (self.cameraZ - self.previousCameraZ) * alpha
+
+    def getDirtyRects(self):
+        """returns the parts of the window the tower changes this frame"""
+        if self.renderCameraZ != self.lastDrawnCameraZ: # everything scrolled
+            return [pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)]
+
+        # only the platforms that are still animating can change, and they only grow towards their final box
+        expanding = self.geometry.getExpandingIndices(self.firstVisible, self.lastVisible + 1)
+        if not expanding.size:
+            return []
+
+        projected = projectVertices(getCorners(self.geometry.final_box[expanding])) + getScreenOffset(self.renderCameraZ)
+        (left, top), (right, bottom) = projected.min(axis=(0, 1)), projected.max(axis=(0, 1))
+        return [pygame.Rect(int(left) - 1, int(top) - 1, int(right - left) + 3, int(bottom - top) + 3)]
+
     def draw(self, screen):
-        for plat in (self.platforms):
-            plat.draw(screen)
\ No newline at end of file
+        self.bakeSettledPlatforms()
+
+        self.lastDrawnCameraZ = self.renderCameraZ
+
+        self.drawnCount = self.lastVisible + 1 - self.firstVisible
+        self.culledCount = self.geometry.count - self.drawnCount
+
+        # the settled part of the tower scrolls down as the camera goes up
+        scroll = round(self.renderCameraZ * ISO_MULTIPLIER) - round(self.bakeCameraZ * ISO_MULTIPLIER) - TOWER_BAKE_HEADROOM
+        screen.blit(self.bakedSurface, (0, max(0, scroll)), pygame.Rect(0, max(0, -scroll), WINDOW_WIDTH, WINDOW_HEIGHT)) # only the part inside the window
+
+        # platforms that are still animating are drawn live
+        self.drawPlatforms(screen, max(self.firstVisible, self.bakedCount), self.lastVisible + 1, self.renderCameraZ)
@@ -0,0 +1,178 @@
+import numpy as np
+
+from constants import *
+from classes.projection import projectVertices
+
+# a box is stored as (x0, x1, y0, y1, z0, z1), these are the indices of each corner's (x, y, z) in that row
+# (corner i has x = x1 if i & 4, y = y1 if i & 2 and z = z1 if i & 1)
+CORNERS = np.array([
+    (0, 2, 4),
+    (0, 2, 5),
+    (0, 3, 4),
+    (0, 3, 5),
+    (1, 2, 4),
+    (1, 2, 5),
+    (1, 3, 4),
+    (1, 3, 5)
+])
+
+def getCorners(boxes):
+    """
+    generates the 8 corners of one or many boxes
+
+    boxes: array of boxes, shaped (6,) or (n, 6)
+    returns an array of corners, shaped (8, 3) or (n, 8, 3)
+    """
+    return boxes[..., CORNERS]
+
+class TowerGeometry:
+    def __init__(self, capacity=64):
+        """
+        stores the geometry of every platform of the tower in contiguous arrays (one row per platform)
+
+        capacity: number of platforms to allocate room for, the arrays double in size when they run out of space
+        """
+        self.count = 0 # number of platforms stored
+        self.capacity = 0
+
+        self.box = np.empty((0, 6), dtype=float) # current (animated) boxes
+        self.final_box = np.empty((0, 6), dtype=float) # boxes at the end of the expansion animation
+        self.initial_box = np.empty((0, 6), dtype=float) # boxes at the start of the expansion animation
+        self.colors = np.empty((0, 3, 3), dtype=np.uint8) # colors of the top, left and right faces
+        self.expanding = np.empty(0, dtype=bool) # whether the platform is running its expansion animation
+
+        # isometric projection of every platform's corners (without the camera offset), recomputed when the box changes
+        self.projected = np.empty((0, 8, 2), dtype=float)
+        self.projectionValid = np.empty(0, dtype=bool)
+
+        self.reserve(capacity)
+
+    def reserve(self, capacity):
+        """
+        grows the arrays so they can hold at least the given number of platforms
+
+        capacity: minimum number of platforms the arrays should hold
+        """
+        if capacity <= self.capacity:
+            return
+
+        newCapacity = max(capacity, self.capacity * 2)
+
+        def grow(array):
+            grown = np.zeros((newCapacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            return grown
+
+        self.box = grow(self.box)
+        self.final_box = grow(self.final_box)
+        self.initial_box = grow(self.initial_box)
+        self.colors = grow(self.colors)
+        self.expanding = grow(self.expanding)
+        self.projected = grow(self.projected)
+        self.projectionValid = grow(self.projectionValid)
+
+        self.capacity = newCapacity
+
+    def append(self, plat):
+        """
+        copies the platform's geometry into the next free row
+
+        plat: the platform object to store
+        returns the index of the row the platform was stored at
+        """
+        if self.count == self.capacity:
+            self.reserve(self.count + 1) # amortized doubling
+
+        index = self.count
+        self.box[index] = plat.box
+        self.final_box[index] = plat.box if plat.final_box is None else plat.final_box
+        self.initial_box[index] = plat.box if plat.initial_box is None else plat.initial_box
+        self.colors[index] = plat.colors
+        self.expanding[index] = plat.expanding
+        self.projectionValid[index] = False
+
+        self.count += 1
+        return index
+
+    def getExpandingIndices(self, start=0, end=None):
+        """
+        returns the indices of the platforms that are running their expansion animation
+
+        start: first index to look at
+        end: index to stop looking at (defaults to the number of platforms)
+        """
+        end = self.count if end is None else end
+        return np.flatnonzero(self.expanding[start:end]) + start
+
+    def invalidateProjection(self, indices):
+        """
+        marks platforms whose box changed so their projection gets recomputed
+
+        indices: indices of the changed platforms
+        """
+        self.projectionValid[indices] = False
+
+    def getProjected(self, start=0, end=None):
+        """
+        returns the isometric projection of the corners of the stored platforms, shaped (end - start, 8, 2),
+        projecting the platforms whose box changed since the last call in a single matrix multiply
+
+        start: index of the first platform
+        end: index to stop at (defaults to the number of platforms)
+        """
+        end = self.count if end is None else end
+
+        stale = np.flatnonzero(~self.projectionValid[start:end]) + start
+        if stale.size:
+            self.projected[stale] = projectVertices(getCorners(self.box[stale]))
+            self.projectionValid[stale] = True
+
+        return self.projected[start:end]
+
+    def getVisibleRange(self, cameraZ):
+        """
+        finds the platforms that can be inside the window for the given camera height
+
+        cameraZ: height of the camera
+        returns a tuple of (first visible index, last visible index + 1)
+        """
+        # the boxes are stacked, so their z columns are sorted and the range can be found with a binary search
+        # the bounds are conservative: the platforms' x / y can push them at most MAXBASESIDE / 2 further down the screen
+        halfWindow = WINDOW_HEIGHT / (2 * ISO_MULTIPLIER)
+
+        start = np.searchsorted(self.box[:self.count, 5], cameraZ - halfWindow, side="right") # tops below the bottom of the window
+        end = np.searchsorted(self.box[:self.count, 4], cameraZ + halfWindow + MAXBASESIDE, side="right") # bottoms above the top of the window
+
+        return int(start), int(end)
+
+    def getVertices(self, start=0, end=None):
+        """
+        returns the corners of the stored platforms' current boxes, shaped (end - start, 8, 3)
+
+        start: index of the first platform
+        end: index to stop at (defaults to the number of platforms)
+        """
+        end = self.count if end is None else end
+        return getCorners(self.box[start:end])
+
+class StoreField:
+    """
+    platform attribute that lives in the platform's own object until the platform is added to the tower,
+    after which it reads and writes the platform's row in the tower geometry store
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.privateName = "_" + name
+
+    def __get__(self, plat, owner=None):
+        if plat is None:
+            return self
+        if plat.store is not None:
+            return getattr(plat.store, self.name)[plat.index]
+        return getattr(plat, self.privateName)
+
+    def __set__(self, plat, value):
+        if plat.store is not None:
+            getattr(plat.store, self.name)[plat.index] = value
+        else:
+            setattr(plat, self.privateName, value)
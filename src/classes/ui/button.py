@@ -1,5 +1,7 @@
 import pygame
 
+from classes.ui.text_cache import textCache
+
 class Button:
     def __init__(self, pos, image=None, image_hover=None, action=None, scale=1.0, 
                  text="", font=None, text_color=(255, 255, 255), 
@@ -8,11 +10,10 @@ class Button:
         self.action = action
         self.hovered = False
         self.clicked = False
-        self.previous_mouse_state = False
         self.is_text_button = image is None
         self.background_transparent = background_transparent
         self.border_radius = border_radius
-        self.sound = sound
+        self.sound = sound # function that plays the click sound
         
         # image button setup
         if not self.is_text_button:
@@ -46,7 +47,7 @@ class Button:
             font_height = self.font.get_height()
             
             # create text surfaces
-            self.text_surface = self.font.render(self.text, True, self.text_color)
+            self.text_surface = textCache.render(self.font, self.text, self.text_color)
             text_width = self.text_surface.get_width()
             
             # calculate visual dimensions based on the font size
@@ -59,24 +60,29 @@ class Button:
             self.rect = pygame.Rect(0, 0, text_width, (font_height // 2) + (font_height // 8))
             self.rect.center = self.visual_rect.center
         
-    def update(self):
-        mouse_pos = pygame.mouse.get_pos()
+    def getBounds(self):
+        """returns the part of the window the button is drawn on"""
+        return self.rect if not self.is_text_button else self.visual_rect
+
+    def updateHover(self, mouse_pos):
+        """update the hover state for the given mouse position"""
         self.hovered = self.rect.collidepoint(mouse_pos)
-        
-        current_mouse_state = pygame.mouse.get_pressed()[0]
-        
-        mouse_just_clicked = current_mouse_state and not self.previous_mouse_state
-        
-        if self.hovered and mouse_just_clicked:
+
+    def handleEvent(self, event):
+        """
+        react to a mouse event
+        returns True if the event clicked the button
+        """
+        if event.type == pygame.MOUSEMOTION:
+            self.updateHover(event.pos)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.rect.collidepoint(event.pos):
             self.clicked = True
             if self.sound:
-                self.sound.play()
+                self.sound()
             if self.action:
                 self.action()
-        else:
-            self.clicked = False
-            
-        self.previous_mouse_state = current_mouse_state
+            return True
+        return False
                 
     def draw(self, surface):
         if not self.is_text_button: # draw image button
@@ -90,7 +96,7 @@ class Button:
             
             # draw text with the appropriate color
             text_color = self.text_hover_color if self.hovered else self.text_color
-            text_surf = self.font.render(self.text, True, text_color)
+            text_surf = textCache.render(self.font, self.text, text_color)
             
             # center text in the button
             text_rect = text_surf.get_rect(center=self.visual_rect.center)
@@ -1,5 +1,7 @@
 import pygame
 
+from classes.ui.text_cache import textCache
+
 class Label:
     def __init__(self, pos, text, font, text_color=(255, 255, 255),
                  visible=True):
@@ -14,7 +16,7 @@ class Label:
     
     def _update_surface(self):
         """update the text surface when text or font changes"""
-        self.text_surface = self.font.render(self.text, True, self.text_color)
+        self.text_surface = textCache.render(self.font, self.text, self.text_color)
         self.rect = self.text_surface.get_rect()
         
         # set position based on pos_type
@@ -39,6 +41,10 @@ class Label:
             self.pos = pos
             self._update_surface()
     
+    def getBounds(self):
+        """returns the part of the window the label is drawn on"""
+        return self.rect
+
     def setVisibility(self, visible):
         """set visibility state"""
         self.visible = visible
@@ -0,0 +1,79 @@
+import pygame
+
+from constants import *
+
+DIGITS = "0123456789"
+
+class ScoreAtlas:
+    atlases = {} # atlas of every font, shared by every UI so restarts don't rebuild them
+
+    @staticmethod
+    def get(font):
+        """returns the atlas of a font, building it the first time"""
+        if font not in ScoreAtlas.atlases:
+            ScoreAtlas.atlases[font] = ScoreAtlas(font)
+        return ScoreAtlas.atlases[font]
+
+    @staticmethod
+    def getLevel(brightness):
+        """
+        quantizes a brightness to one of the atlas' dimmed levels
+
+        brightness: factor applied to the text color (SCORE_MIN_BRIGHTNESS to 1)
+        returns the level (0 is the dimmest, SCORE_DIM_LEVELS - 1 is the full color)
+        """
+        t = (brightness - SCORE_MIN_BRIGHTNESS) / (1 - SCORE_MIN_BRIGHTNESS)
+        return max(0, min(SCORE_DIM_LEVELS - 1, round(t * (SCORE_DIM_LEVELS - 1))))
+
+    def __init__(self, font, color=(255, 255, 255)):
+        """
+        renders every digit once so numbers can be drawn with blits instead of font renders
+
+        font: pygame font of the numbers
+        color: color of the digits at full brightness
+        """
+        self.height = font.get_height()
+        self.glyphs = {(digit, SCORE_DIM_LEVELS - 1): font.render(digit, True, color) for digit in DIGITS} # (digit, level) -> surface
+
+        # extra space between each pair of digits (negative when they're kerned closer)
+        self.kerning = {
+            (left, right): font.size(left + right)[0] - font.size(left)[0] - font.size(right)[0]
+            for left in DIGITS for right in DIGITS
+        }
+
+    def getGlyph(self, digit, level):
+        """returns the surface of a digit at a dimmed level (dimmed versions are made from the full color one on first use)"""
+        if (digit, level) not in self.glyphs:
+            brightness = SCORE_MIN_BRIGHTNESS + (1 - SCORE_MIN_BRIGHTNESS) * level / (SCORE_DIM_LEVELS - 1)
+            value = int(255 * brightness)
+
+            glyph = self.glyphs[(digit, SCORE_DIM_LEVELS - 1)].copy()
+            glyph.fill((value, value, value), special_flags=pygame.BLEND_RGB_MULT) # the alpha (the antialiasing) is kept
+            self.glyphs[(digit, level)] = glyph
+
+        return self.glyphs[(digit, level)]
+
+    def compose(self, number, level=SCORE_DIM_LEVELS - 1):
+        """
+        draws a number from the digits' glyphs
+
+        number: the number to draw
+        level: dimmed level of the digits (see getLevel)
+        returns a new surface with the number
+        """
+        text = str(number)
+        glyphs = [self.getGlyph(digit, level) for digit in text]
+
+        # place each digit after the previous one, adjusted by the pair's kerning
+        positions = []
+        x = 0
+        for i, glyph in enumerate(glyphs):
+            if i > 0:
+                x += self.kerning[(text[i - 1], text[i])]
+            positions.append(x)
+            x += glyph.get_width()
+
+        # the surface starts transparent, so the glyphs can be copied with a max instead of an (expensive) alpha blend
+        surface = pygame.Surface((x, self.height), pygame.SRCALPHA)
+        surface.blits([(glyph, (position, 0), None, pygame.BLEND_RGBA_MAX) for glyph, position in zip(glyphs, positions)], doreturn=False)
+        return surface
@@ -47,28 +47,36 @@ class Slider:
         """get current slider value"""
         return self.value
 
-    def update(self):
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        
-        # check if mouse is over handle
+    def getBounds(self):
+        """returns the part of the window the slider can be drawn on (track and every handle position)"""
+        return self.rect.inflate(self.handle_width * 2, self.handle_height)
+
+    def updateHover(self, mouse_pos):
+        """update the hover state for the given mouse position"""
         self.hovered = self.handle_rect.collidepoint(mouse_pos)
-        
-        # handle dragging
-        if self.dragging:
-            if mouse_pressed:
+
+    def handleEvent(self, event):
+        """
+        react to a mouse event
+        returns True if the event grabbed the handle
+        """
+        if event.type == pygame.MOUSEMOTION:
+            if self.dragging:
                 # calculate new value based on mouse position
-                x_pos = max(self.rect.x, min(mouse_pos[0], self.rect.x + self.rect.width))
+                x_pos = max(self.rect.x, min(event.pos[0], self.rect.x + self.rect.width))
                 value_ratio = (x_pos - self.rect.x) / self.rect.width
                 self.value = self.min_value + (self.max_value - self.min_value) * value_ratio
                 self.update_handle_position()
                 
                 if self.action:
                     self.action(self.value)
-            else:
-                self.dragging = False
-        elif self.hovered and mouse_pressed:
+            self.updateHover(event.pos)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.handle_rect.collidepoint(event.pos):
             self.dragging = True
+            return True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.dragging = False
+        return False
     
     def draw(self, surface):
         # draw track background
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+from constants import *
+
+class TextCache:
+    def __init__(self, maxSize=TEXT_CACHE_SIZE):
+        """
+        keeps the most recently rendered text surfaces so the same text isn't rendered every frame
+
+        maxSize: number of surfaces kept, the least recently used one is dropped when it's full
+        """
+        self.maxSize = maxSize
+        self.surfaces = OrderedDict() # (font, text, color, antialias) -> surface, from least to most recently used
+
+        self.hits = 0 # number of renders served from the cache
+        self.misses = 0 # number of renders that called font.render
+
+    def render(self, font, text, color, antialias=True):
+        """
+        returns the rendered text, rendering it only if it isn't cached
+        (the surface is shared, so it must not be modified: copy it first)
+
+        font: pygame font to render with
+        text: text to render
+        color: color of the text
+        antialias: whether the text is antialiased
+        """
+        key = (font, text, tuple(color), antialias)
+
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxSize:
+            self.surfaces.popitem(last=False)
+
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+textCache = TextCache() # shared by every UI element
@@ -6,7 +6,9 @@ from classes.state_manager import GameState
 from classes.ui.label import Label
 from classes.ui.button import Button
 from classes.ui.slider import Slider
-from utils.utils import ease_in_out, darkenColor
+from classes.ui.score_atlas import ScoreAtlas
+from utils.utils import ease_in_out
+from utils.system_utils import getAssetPath
 from constants import *
 
 class UI:
@@ -79,11 +81,14 @@ class UI:
         
         # set the button click sound from the game's sound manager
         if UI.button_click_sound is None and game.sound_manager.button_click_sfx:
-            UI.button_click_sound = game.sound_manager.button_click_sfx[0]
+            UI.button_click_sound = game.sound_manager.play_button_click
         
         self.last_score = -1 # last score to know when to re-render
         self.score_surface = None
         self.score_rect = None
+        self.scoreAtlas = ScoreAtlas.get(self.score_font) # the score is drawn from pre-rendered digits
+        self.dark_score_key = None # (score, dimmed level) of the dimmed score surface
+        self.dark_score_surface = None
 
         # score animation properties
         self.score_animating = False
@@ -98,6 +103,11 @@ class UI:
         self.darkening_alpha = 0  # 0-255, 0 is transparent, 255 is fully dark
         self.target_darkening_alpha = 128  # medium darkness when paused
 
+        # state of the last drawn frame, to know what changed in dirty rect mode
+        self.lastDrawnState = None
+        self.hoverChanged = False # a widget's hover state changed since the last frame
+        self.hoverState = None # state the hover states were last computed for
+
         # load icons
         self.loadIcons()
 
@@ -106,35 +116,25 @@ class UI:
         self.createGameoverElements()
         self.createSettingsPauseMenuElements()
 
+        # index of the widgets that react to the mouse in each state
+        self.buildWidgetRegistry()
+
     def loadFonts(self):
-        self.gameTitleFont = pygame.font.Font(LIGHT_FONT, 100)
-        self.tapToStartFont = pygame.font.Font(HAIRLINE_FONT, 35)
-        self.tapToRestartFont = pygame.font.Font(HAIRLINE_FONT, 45)
-        self.score_font = pygame.font.Font(SCORE_FONT, 100)
-        self.regularFont = pygame.font.Font(LIGHT_FONT, 60)
-        self.menuOptionFont = pygame.font.Font(HAIRLINE_FONT, 40)
-        self.goBackFont = pygame.font.Font(HAIRLINE_FONT, 30)
+        loader = self.game.assetLoader # the fonts were decoded while loading
+        self.gameTitleFont = loader.get("font", LIGHT_FONT, 100)
+        self.tapToStartFont = loader.get("font", HAIRLINE_FONT, 35)
+        self.tapToRestartFont = loader.get("font", HAIRLINE_FONT, 45)
+        self.score_font = loader.get("font", SCORE_FONT, 100)
+        self.regularFont = loader.get("font", LIGHT_FONT, 60)
+        self.menuOptionFont = loader.get("font", HAIRLINE_FONT, 40)
+        self.goBackFont = loader.get("font", HAIRLINE_FONT, 30)
 
     def loadIcons(self):
-        try:
-            self.settingsIcon = pygame.image.load("assets/images/settingsIcon/gear_solid.png").convert_alpha()
-        except pygame.error as e:
-            print(f"Error loading assets/images/settingsIcon/gear_solid.png: {e}")
-        
-        try:
-            self.settingsIconHover = pygame.image.load("assets/images/settingsIcon/gear_solid_hover.png").convert_alpha()
-        except pygame.error as e:
-            print(f"Error loading assets/images/settingsIcon/gear_solid_hover.png: {e}")
-
-        try:
-            self.pauseIcon = pygame.image.load("assets/images/pauseIcon/pause_solid.png").convert_alpha()
-        except pygame.error as e:
-            print(f"Error loading assets/images/pauseIcon/pause_solid.png: {e}")
-
-        try:
-            self.pauseIconHover = pygame.image.load("assets/images/pauseIcon/pause_solid_hover.png").convert_alpha()
-        except pygame.error as e:
-            print(f"Error loading assets/images/pauseIcon/pause_solid_hover.png: {e}")
+        loader = self.game.assetLoader # the icons were decoded while loading
+        self.settingsIcon = loader.getImage(getAssetPath("images", "settingsIcon", "gear_solid.png"), ICON_SCALE)
+        self.settingsIconHover = loader.getImage(getAssetPath("images", "settingsIcon", "gear_solid_hover.png"), ICON_SCALE)
+        self.pauseIcon = loader.getImage(getAssetPath("images", "pauseIcon", "pause_solid.png"), ICON_SCALE)
+        self.pauseIconHover = loader.getImage(getAssetPath("images", "pauseIcon", "pause_solid_hover.png"), ICON_SCALE)
 
     def createMenuElements(self):
         self.gameTitleLabel = UI.createLabel(
@@ -155,7 +155,6 @@ class UI:
             pos=(WINDOW_WIDTH - 40, 10),
             image=self.settingsIcon,
             image_hover=self.settingsIconHover,
-            scale=0.1,
             with_sound=True,
             action=self.game.toggleSettings,
         )
@@ -181,7 +180,6 @@ class UI:
             pos=(30, 10),
             image=self.pauseIcon,
             image_hover=self.pauseIconHover,
-            scale=0.1,
             with_sound=False,
             action=self.game.togglePause,
         )
@@ -256,31 +254,97 @@ class UI:
             action=self.game.sound_manager.set_sfx_volume
         )
 
-    def isAnyUnwantedButtonHovered(self):
-        """check if any unwanted button is hovered"""
-        # update the pause button's hover state first
-        mouse_pos = pygame.mouse.get_pos()
-        
-        if self.game.state_manager.isState(GameState.PLAYING):
-            self.pauseIconButton.hovered = self.pauseIconButton.rect.collidepoint(mouse_pos)
-            return self.pauseIconButton.hovered
-        elif self.game.state_manager.isState(GameState.MENU):
-            self.settingsIconButton.hovered = self.settingsIconButton.rect.collidepoint(mouse_pos)
-            return self.settingsIconButton.hovered
-
+    def getWidgets(self, state):
+        """returns the widgets drawn in the given state"""
+        if state == GameState.MENU:
+            return [self.gameTitleLabel, self.tapToStartLabel, self.settingsIconButton]
+        elif state == GameState.PLAYING:
+            return [self.pauseIconButton]
+        elif state == GameState.PAUSED:
+            return [self.MenuLabel, self.resumeButton, self.restartButton, self.settingsButton]
+        elif state == GameState.SETTINGS:
+            return [self.MenuLabel, self.settingsGoBackButton, self.volumeSlider, self.volumeLabel, self.volumePercentageLabel]
+        elif state == GameState.GAMEOVER:
+            return [self.tapToRestartLabel]
+        return []
+
+    def buildWidgetRegistry(self):
+        """
+        group the interactive widgets of each state with their hitboxes,
+        so a click only has to be tested against the widgets that are on screen
+        """
+        self.widgetRegistry = {}
+        for state in GameState:
+            widgets = [widget for widget in self.getWidgets(state) if hasattr(widget, "handleEvent")]
+            rects = [widget.getBounds() for widget in widgets] # the widgets never move, a slider's bounds cover its handle
+            self.widgetRegistry[state] = (widgets, rects)
+
+    def refreshHover(self):
+        """recompute the hover states when the screen changed under a still mouse"""
+        state = self.game.state_manager.current_state
+        if state != self.hoverState:
+            mouse_pos = pygame.mouse.get_pos()
+            for widget in self.widgetRegistry[state][0]:
+                widget.updateHover(mouse_pos)
+            self.hoverState = state
+
+    def handleEvent(self, event):
+        """
+        send a mouse event to the widgets of the current state
+
+        event: the pygame event
+        returns True if a widget used the click
+        """
+        self.refreshHover()
+        widgets, rects = self.widgetRegistry[self.game.state_manager.current_state]
+
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            index = pygame.Rect(event.pos, (1, 1)).collidelist(rects)
+            return index != -1 and widgets[index].handleEvent(event)
+
+        if event.type == pygame.MOUSEMOTION:
+            for widget in widgets:
+                hovered = widget.hovered
+                widget.handleEvent(event)
+                self.hoverChanged |= widget.hovered != hovered
+        elif event.type == pygame.MOUSEBUTTONUP:
+            for widget in widgets:
+                widget.handleEvent(event)
         return False
 
+    def collectDirtyRects(self, score):
+        """
+        returns the parts of the window the UI changes this frame
+
+        score: the score that will be drawn
+        """
+        state = self.game.state_manager.current_state
+
+        rects = []
+        if state != self.lastDrawnState or self.darkening_animating or self.score_animating or self.volumeSlider.dragging:
+            rects.append(pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT))
+        else:
+            # the score can change width, so repaint its whole row
+            if score != self.last_score and self.score_rect is not None:
+                rects.append(pygame.Rect(0, self.score_rect.top, WINDOW_WIDTH, self.score_rect.height))
+
+            # hover effects only change when the mouse moves over a widget
+            if self.hoverChanged:
+                rects.extend(self.widgetRegistry[state][1])
+
+        self.lastDrawnState = state
+        self.hoverChanged = False
+        return rects
+
     def drawMenu(self, screen):
         """draw the menu screen elements"""
         self.gameTitleLabel.draw(screen)
         self.tapToStartLabel.draw(screen)
 
-        self.settingsIconButton.update()
         self.settingsIconButton.draw(screen)
 
     def drawPlayingScreen(self, screen, score):
         """draw the playing screen elements"""
-        self.pauseIconButton.update()
         self.pauseIconButton.draw(screen)
 
     def drawGameOverScreen(self, screen):
@@ -292,13 +356,8 @@ class UI:
             self.MenuLabel.setText("Game Paused")
         self.MenuLabel.draw(screen)
 
-        self.resumeButton.update()
         self.resumeButton.draw(screen)
-
-        self.restartButton.update()
         self.restartButton.draw(screen)
-
-        self.settingsButton.update()
         self.settingsButton.draw(screen)
 
     def drawSettingsMenu(self, screen):
@@ -306,10 +365,7 @@ class UI:
             self.MenuLabel.setText("Settings")
         self.MenuLabel.draw(screen)
 
-        self.settingsGoBackButton.update()
         self.settingsGoBackButton.draw(screen)
-        
-        self.volumeSlider.update()
         self.volumeSlider.draw(screen)
 
         volumePercentage = self.volumeSlider.getValue() * 100
@@ -323,7 +379,7 @@ class UI:
 
         if score != self.last_score:
             self.last_score = score
-            self.score_surface = self.score_font.render(f"{score}", True, (255, 255, 255))
+            self.score_surface = self.scoreAtlas.compose(score)
             self.score_rect = self.score_surface.get_rect(midtop=(WINDOW_WIDTH // 2, 50))
 
         if score > 0:
@@ -331,7 +387,7 @@ class UI:
                 self.score_animating = True
                 self.score_animation_start_time = time.time()
 
-                self.score_surface = self.score_font.render(f"{score}", True, (255, 255, 255))
+                self.score_surface = self.scoreAtlas.compose(score)
                 self.score_rect = self.score_surface.get_rect(midtop=(WINDOW_WIDTH // 2, 50))
             
             if self.score_animating and score == 1:
@@ -351,12 +407,12 @@ class UI:
                     # calculate darkness factor based on darkening alpha
                     darkness_factor = max(0.4, 1.0 - (self.darkening_alpha / 255) * 0.5)
                     
-                    # starting with white (255, 255, 255)
-                    dimmed_color = darkenColor((255, 255, 255), darkness_factor)
-                    
-                    # render with the darker color
-                    dark_score_surface = self.score_font.render(f"{score}", True, dimmed_color)
-                    screen.blit(dark_score_surface, self.score_rect)
+                    # compose the score from the atlas' digits dimmed to the closest level
+                    level = ScoreAtlas.getLevel(darkness_factor)
+                    if (score, level) != self.dark_score_key:
+                        self.dark_score_key = (score, level)
+                        self.dark_score_surface = self.scoreAtlas.compose(score, level)
+                    screen.blit(self.dark_score_surface, self.score_rect)
                 else:
                     screen.blit(self.score_surface, self.score_rect)
 
@@ -412,6 +468,8 @@ class UI:
         screen.blit(self.darkening_surface, (0, 0))
 
     def drawUi(self, screen, score, paused):
+        self.refreshHover()
+
         if self.game.state_manager.current_state not in [GameState.LOADING, GameState.MENU]:
             self.drawScore(screen, score)
         
@@ -1,10 +1,17 @@
-from utils.system_utils import getCurrentMonitorFramerate, count_sounds_in_directory
+import os
 
 # constants
 WINDOW_WIDTH = 585
 WINDOW_HEIGHT = 900
 
-FRAMERATE = getCurrentMonitorFramerate()  # get the monitor's refresh rate
+DIRTY_RECTS = False  # only repaint and present the parts of the window that changed each frame
+
+FALLBACK_FRAMERATE = 60  # frame rate used when the monitor's refresh rate can't be detected
+
+SIMULATION_HZ = 120  # number of fixed simulation steps per second (independent from the frame rate)
+MAX_SIMULATION_STEPS = 8  # maximum number of simulation steps per frame
+
+IDLE_FRAMERATE = 10  # frame rate of the idle states (menus) when nothing is animating
 
 DECIMALPLACES = 3  # number of decimal places to round to
 
@@ -19,6 +26,25 @@ MAXPERFECTOFFSETPERCENTAGE = 0.12  # maximum offset for a perfect placement
 MINVALIDSIDE = 0.15  # minimum valid side length for a platform
 
 PERFECT_STACKS_TO_EXPAND = 8 # number of perfect stacks to expand the platform
+PERFECT_STACK_SCALE = (0, 2, 4, 5, 7, 9, 11)  # semitones of each step of the perfect stack streak within an octave (major scale)
+PERFECT_STACK_MAX_SEMITONES = 24  # highest pitch of the perfect stack streak, in semitones above the base sample
+ICON_SCALE = 0.1  # scale the icon images are drawn at (they're scaled once when loading)
+TEXT_CACHE_SIZE = 128  # number of rendered texts kept by the UI
+SCORE_DIM_LEVELS = 32  # number of brightness levels the score can be dimmed to (while paused)
+SCORE_MIN_BRIGHTNESS = 0.4  # brightness of the dimmest level of the score
+
+# mixer formats (a smaller buffer lowers the delay between playing a sound and hearing it, but can crackle on slow hardware)
+AUDIO_PROFILES = {
+    "low_latency": {"frequency": 44100, "size": -16, "channels": 2, "buffer": 256},
+    "default": {"frequency": 44100, "size": -16, "channels": 2, "buffer": 512},
+    "safe": {"frequency": 44100, "size": -16, "channels": 2, "buffer": 2048},
+}
+AUDIO_PROFILE = "low_latency"  # audio profile the mixer is initialized with
+AUDIO_LATENCY_PROBE = False  # measure and print the audio latency at startup
+AUDIO_PROBE_TRIALS = 5  # number of measurements of the latency probe
+AUDIO_PROBE_TIMEOUT = 0.5  # maximum time a latency measurement waits for the mixer, in seconds
+AUDIO_PROBE_PRIORITY = 1000  # priority of the probe's sound (so it isn't dropped by the channel pool)
+SFX_CHANNEL_GROUPS = {"stack": 2, "perfect": 3, "expand": 1, "ui": 2}  # mixer channels reserved for each category of sounds
 EXPANDAMOUNT = 2.5  # amount to expand the platform by
 EXPAND_MARGIN = 1.5  # margin for expanding the platform
 
@@ -29,9 +55,13 @@ BACKGROUNDLIGHTENING = 1.4  # background lightening factor
 BACKGROUNDDESATURATION = 0.4  # background desaturation factor
 MINCVALUE, MAXCVALUE = 25, 175  # MINIMUM AND MAXIMUM COLOR VALUES
 MINNSTEPS, MAXNSTEPS = 7, 10  # MINIMUM AND MAXIMUM NUMBER OF STEPS FOR THE GRADIENT
+COLORPOOLSIZE = 64  # number of candidate colors drawn at a time for the gradients
+MAXCOLORREFILLS = 8  # maximum number of times the candidate pool is refilled when looking for a gradient color
+GRADIENT_SEED = None  # seed of the gradient colors (None for different colors every run, a number to always get the same ones)
 NEWGRADIENTCOUNT = 2  # number of new gradients to create at a time
+GRADIENTHISTORY = 50  # number of platforms below the current one whose gradients are kept
 
-BACKGROUND_ROW_GROUP_SIZE = 5  # define the number of rows to group together
+BACKGROUND_CACHE_SIZE = 4  # number of static background surfaces kept in the cache
 BACKGROUND_ANIMATION_CHANCE = .5  # chance of a background animation
 MIN_DISTANCE, MAX_DISTANCE = 1, 3  # minimum and maximum distance between indexes of colors of the background gradient
 
@@ -40,15 +70,22 @@ VELINCREMENT = 0.20  # velocity increment
 
 ISO_MULTIPLIER = 25
 
-NUM_NORMAL_STACK_SFX = count_sounds_in_directory("assets/SFX/normalStack")  # number of normal stacking sound effects
-NUM_PERFECT_STACK_SFX = count_sounds_in_directory("assets/SFX/perfectStack")  # number of perfect stacking sound effects
-NUM_EXPAND_SFX = count_sounds_in_directory("assets/SFX/expandPlatform")  # number of expand sound effects
-NUM_PAUSE_GAME_SFX = count_sounds_in_directory("assets/SFX/pauseGame")  # number of pause game sound effects
-NUM_RESUME_GAME_SFX = count_sounds_in_directory("assets/SFX/resumeGame")  # number of resume game sound effects
-NUM_BUTTON_CLICK_SFX = count_sounds_in_directory("assets/SFX/buttonClick")  # number of button click sound effects
+TOWER_BAKE_HEADROOM = WINDOW_HEIGHT // 2  # extra pixels kept above the window in the baked tower surface
+TOWER_BAKE_COLORKEY = (255, 0, 255)  # transparent color of the baked tower surface (never produced by the platform colors)
+
+LOADING_BAR_SIZE = (300, 6)  # size of the loading progress bar
+LOADING_BAR_COLOR = (255, 255, 255)  # color of the loaded part of the progress bar
+LOADING_TRACK_COLOR = (70, 70, 70)  # color of the rest of the progress bar
+LOADING_BACKGROUND_COLOR = (25, 25, 25)  # background color of the loading screen
+
+# assets (resolved from the project's folder, not the working directory)
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+ASSET_MANIFEST = "manifest.json"  # lists the sounds, images and fonts to load, read when loading starts
+ASSET_LOADER_WORKERS = 8  # number of assets decoded at the same time
+AUDIO_BANK = "sfx.bank"  # pre-decoded sound effects (built by build_audio_bank.py)
 
 # fonts
-LIGHT_FONT = "assets/fonts/Cresta-Light.ttf"
-REGULAR_FONT = "assets/fonts/Cresta-Regular.ttf"
-SCORE_FONT = "assets/fonts/Arial-Black.ttf"
-HAIRLINE_FONT = "assets/fonts/Cresta-Hairline.ttf"
\ No newline at end of file
+LIGHT_FONT = os.path.join(ASSETS_DIR, "Fonts", "Cresta-Light.ttf")
+REGULAR_FONT = os.path.join(ASSETS_DIR, "Fonts", "Cresta-Regular.ttf")
+SCORE_FONT = os.path.join(ASSETS_DIR, "Fonts", "Arial-Black.ttf")
+HAIRLINE_FONT = os.path.join(ASSETS_DIR, "Fonts", "Cresta-Hairline.ttf")
\ No newline at end of file
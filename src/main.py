@@ -2,6 +2,10 @@ import pygame
 
 from constants import *
 from classes.game import Game
+from classes.sound.sound_manager import Sound
+
+# the mixer's format has to be set before pygame initializes it
+Sound.pre_init()
 
 # initialize pygame
 try:
@@ -10,19 +14,39 @@ except pygame.error as e:
     print(f"Failed to initialize Pygame: {e}")
     exit(1)
 
-print(f"Running at {FRAMERATE} FPS")
-
 # game loop
 game = Game()
 
+print(f"Running at {game.framerate} FPS")
+
+if AUDIO_LATENCY_PROBE:
+    latency = game.sound_manager.probe_latency()
+    if latency is not None:
+        print(f"Audio latency: {latency * 1000:.1f} ms ({AUDIO_PROFILE} profile)")
+
 while game.running:
-    delta_time = game.clock.tick(FRAMERATE) / 1000.0  # delta_time is the time it takes to render one frame
+    idle = game.isIdle()
+    if idle:
+        # nothing is animating, so sleep until there's input (or redraw at the idle frame rate)
+        game.waitForEvents(1000 // IDLE_FRAMERATE)
+    else:
+        # keep reading the input until the frame is due, so placements use the moment of the input
+        game.waitForNextFrame()
+
+    delta_time = game.clock.tick(game.framerate) / 1000.0  # delta_time is the time it takes to render one frame
+    if idle:
+        delta_time = min(delta_time, 1 / game.framerate)  # the time spent waiting isn't part of any animation
     
     game.handleEvents()
     game.drawGame(delta_time)
-    pygame.display.flip()
+
+    if DIRTY_RECTS:
+        pygame.display.update(game.dirtyRects)  # only present what changed
+    else:
+        pygame.display.flip()
 
 if game.sound_manager:
     game.sound_manager.shutdown()
+game.assetLoader.shutdown()
 
 pygame.quit()
@@ -1,17 +1,153 @@
-import win32print
-import win32gui
+import ctypes
+import glob
+import json
 import os
+from functools import lru_cache
 
-def getCurrentMonitorFramerate():
+import pygame
+
+from constants import *
+
+_refreshRates = {} # refresh rate of every display that was queried, by display index
+
+SDL_PEEKEVENT = 1 # SDL_PeepEvents action that reads the events without taking them out of the queue
+TIMESTAMPED_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN) # input events that get their timestamp (pygame uses SDL's event types)
+
+class SDLDisplayMode(ctypes.Structure):
+    """SDL_DisplayMode, filled by SDL_GetCurrentDisplayMode"""
+    _fields_ = [
+        ("format", ctypes.c_uint32),
+        ("w", ctypes.c_int),
+        ("h", ctypes.c_int),
+        ("refresh_rate", ctypes.c_int),
+        ("driverdata", ctypes.c_void_p)
+    ]
+
+class SDLCommonEvent(ctypes.Structure):
+    """the header every SDL_Event starts with, padded to the size of the SDL_Event union"""
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("timestamp", ctypes.c_uint32),
+        ("padding", ctypes.c_uint8 * 48)
+    ]
+
+@lru_cache(maxsize=None)
+def loadSDL():
     """
-    gets the current monitor's refresh rate
+    opens the SDL library pygame was built with (the one already loaded, so it shares pygame's display state)
+    returns None if it can't be found
     """
-    dc = win32gui.GetDC(0)  # get device context
-    framerate = win32print.GetDeviceCaps(dc, 116)  # get refresh rate of the monitor
-    win32gui.ReleaseDC(0, dc)  # release device context
-    return framerate
+    pygameDir = os.path.dirname(pygame.__file__)
+    candidates = glob.glob(os.path.join(pygameDir, "SDL2.dll")) + \
+                 glob.glob(os.path.join(pygameDir, ".dylibs", "libSDL2*")) + \
+                 glob.glob(os.path.join(pygameDir, os.pardir, "pygame.libs", "libSDL2-*"))
+
+    for path in candidates:
+        try:
+            return ctypes.CDLL(path)
+        except OSError:
+            continue
+    return None
 
-def count_sounds_in_directory(directory):
-    if not os.path.exists(directory): # if the directory does not exist
+def getWindowDisplayIndex():
+    """gets the index of the display the window is on (0 if it can't be found)"""
+    try:
+        from pygame._sdl2.video import Window
+        return Window.from_display_module().display_index
+    except (ImportError, AttributeError, pygame.error):
         return 0
-    return len([f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f)) and f.endswith('.wav')]) # return the number of files in the directory that end with .wav
\ No newline at end of file
+
+def queryRefreshRate(displayIndex):
+    """
+    asks SDL for a display's refresh rate
+
+    displayIndex: index of the display
+    returns the refresh rate in Hz, 0 if it's unknown
+    """
+    getRefreshRates = getattr(pygame.display, "get_desktop_refresh_rates", None) # not available in every pygame version
+    if getRefreshRates is not None:
+        rates = getRefreshRates()
+        if displayIndex < len(rates):
+            return rates[displayIndex]
+
+    sdl = loadSDL()
+    if sdl is not None:
+        mode = SDLDisplayMode()
+        if sdl.SDL_GetCurrentDisplayMode(displayIndex, ctypes.byref(mode)) == 0:
+            return mode.refresh_rate
+    return 0
+
+def getCurrentMonitorFramerate(displayIndex=None):
+    """
+    gets the refresh rate of the monitor the window is on, queried once per display
+
+    displayIndex: index of the display (defaults to the one the window is on)
+    returns the refresh rate, or FALLBACK_FRAMERATE if it can't be detected
+    """
+    if displayIndex is None:
+        displayIndex = getWindowDisplayIndex()
+
+    if displayIndex not in _refreshRates:
+        _refreshRates[displayIndex] = queryRefreshRate(displayIndex) or FALLBACK_FRAMERATE
+    return _refreshRates[displayIndex]
+
+def peekEventTimestamps(eventType, maxEvents=64):
+    """
+    reads when SDL received the events of a type that are waiting in the queue, without taking them out
+
+    eventType: SDL (and pygame) event type
+    maxEvents: maximum number of events to read
+    returns the timestamps in queue order, in milliseconds like pygame.time.get_ticks (empty if SDL can't be reached)
+    """
+    sdl = loadSDL()
+    if sdl is None:
+        return []
+
+    events = (SDLCommonEvent * maxEvents)()
+    count = sdl.SDL_PeepEvents(events, maxEvents, SDL_PEEKEVENT, eventType, eventType)
+    return [events[i].timestamp for i in range(max(count, 0))]
+
+def getTimestampedEvents():
+    """
+    takes every event out of pygame's queue, giving the input events the moment SDL received them
+    (pygame 2 events have no timestamp, so it's read from SDL's queue before pygame empties it)
+
+    returns the list of events, the TIMESTAMPED_EVENTS ones get a timestamp attribute in pygame ticks when it's known
+    """
+    timestamps = {eventType: peekEventTimestamps(eventType) for eventType in TIMESTAMPED_EVENTS}
+
+    events = pygame.event.get()
+    for event in events:
+        if timestamps.get(event.type): # events SDL received after the peek have no timestamp
+            event.timestamp = timestamps[event.type].pop(0)
+    return events
+
+def getAssetPath(*parts):
+    """returns the absolute path of a file in the assets folder (independent from the working directory)"""
+    return os.path.join(ASSETS_DIR, *parts)
+
+@lru_cache(maxsize=None)
+def loadManifest():
+    """reads the asset manifest the first time it's needed (an empty manifest if it's missing)"""
+    try:
+        with open(getAssetPath(ASSET_MANIFEST)) as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Error loading the asset manifest: {e}")
+        return {}
+
+def getSoundFiles(folder):
+    """
+    gets the sound effects of a category, in order
+
+    folder: name of the category's folder in assets/SFX
+    returns the file names listed in the manifest, or the .wav files of the folder if the category isn't listed
+    """
+    files = loadManifest().get("sfx", {}).get(folder)
+    if files is not None:
+        return files
+
+    directory = getAssetPath("SFX", folder)
+    if not os.path.isdir(directory): # if the directory does not exist
+        return []
+    return sorted((f for f in os.listdir(directory) if f.endswith('.wav')), key=lambda f: (len(f), f)) # stack2.wav comes before stack10.wav
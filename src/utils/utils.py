@@ -1,3 +1,5 @@
+import numpy as np
+
 # animations
 
 def ease_in_out(t): # easing function for the animations (t is the time variable)
@@ -46,4 +48,26 @@ def desaturateColor(rgb, factor=0.5):
         int(g + (gray - g) * factor),
         int(b + (gray - b) * factor)
     )
-    return desaturated
\ No newline at end of file
+    return desaturated
+
+def lightenColors(colors, factor=1.2):
+    """
+    vectorized version of lightenColor
+    
+    colors: array of (r, g, b) values, shaped (..., 3)
+    factor: lightening factor (should be > 1.0)
+    returns an integer array of lightened (r, g, b) values
+    """
+    return np.clip(np.trunc(colors * factor), 0, 255)
+
+def desaturateColors(colors, factor=0.5):
+    """
+    vectorized version of desaturateColor
+    
+    colors: array of (r, g, b) values, shaped (..., 3)
+    factor: desaturation factor (0.0 = fully saturated, 1.0 = fully desaturated)
+    returns an integer array of desaturated (r, g, b) values
+    """
+    r, g, b = colors[..., 0], colors[..., 1], colors[..., 2]
+    gray = np.trunc(0.3 * r + 0.59 * g + 0.11 * b)[..., np.newaxis]  # convert to grayscale using luminance formula
+    return np.trunc(colors + (gray - colors) * factor)